@@ -1,6 +1,9 @@
 """Microsoft Family Safety integration."""
 
+import asyncio
 import logging
+from collections.abc import Mapping
+from typing import Any
 
 from pyfamilysafety import FamilySafety
 from pyfamilysafety.exceptions import HttpException, Unauthorized, AggregatorException
@@ -12,62 +15,192 @@ from homeassistant.exceptions import (
     ConfigEntryAuthFailed,
     HomeAssistantError
 )
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN, AGG_ERROR, CONF_EXPR_DEFAULT, CONF_KEY_EXPR
-from .coordinator import FamilySafetyCoordinator
+from .const import (
+    DOMAIN,
+    AGG_ERROR,
+    CONF_EXPR_DEFAULT,
+    CONF_KEY_EXPR,
+    CONF_KEY_SLOW_INTERVAL,
+    CONF_SLOW_INTERVAL_DEFAULT,
+    CONF_KEY_ADAPTIVE,
+    CONF_ADAPTIVE_DEFAULT,
+    CONF_KEY_MAX_INTERVAL,
+    CONF_MAX_INTERVAL_DEFAULT,
+    CONF_KEY_USAGE_LIMIT,
+    CONF_USAGE_LIMIT_DEFAULT,
+    CONF_KEY_USAGE_THRESHOLD,
+    CONF_USAGE_THRESHOLD_DEFAULT,
+    CONF_KEY_CONCURRENCY,
+    CONF_CONCURRENCY_DEFAULT,
+    CONF_KEY_REQUEST_TIMEOUT,
+    CONF_REQUEST_TIMEOUT_DEFAULT,
+    CONF_KEY_REQUEST_INTERVAL,
+    CONF_REQUEST_INTERVAL_DEFAULT,
+    CONF_KEY_SLOW_CALL_THRESHOLD,
+    CONF_SLOW_CALL_THRESHOLD_DEFAULT,
+    CONF_KEY_STATISTICS,
+    CONF_STATISTICS_DEFAULT,
+    LOGIN_RETRY_DELAY,
+    LOGIN_RETRY_MAX_DELAY
+)
+from .catalog import ApplicationCatalog
+from .history import UsageHistory
+from .client import async_create_client
+from .coordinator import FamilySafetyCoordinator, async_load_snapshot, snapshot_store
 from .config_entry import FamilySafetyConfigEntry
+from .entity_base import async_track_removed_accounts
+from .services import async_setup_services
+from .statistics import StatisticsImporter
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORMS = [Platform.SENSOR, Platform.SWITCH]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the domain services."""
+    async_setup_services(hass)
+    return True
+
+
+async def _async_create_api(hass: HomeAssistant, entry: FamilySafetyConfigEntry) -> FamilySafety:
+    """Log in and collect all data."""
+    return await async_create_client(
+        hass,
+        token=entry.options.get(
+            "refresh_token", entry.options.get("refresh_token", entry.data.get("refresh_token"))),
+        experimental=entry.options.get(CONF_KEY_EXPR, CONF_EXPR_DEFAULT)
+    )
+
+
+def _options_without_token(options: Mapping[str, Any]) -> dict[str, Any]:
+    """Return config entry options excluding the refresh token."""
+    return {k: v for k, v in options.items() if k != "refresh_token"}
+
+
+def _coordinator_options(entry: FamilySafetyConfigEntry) -> dict[str, Any]:
+    """Return the coordinator settings from the config entry options."""
+    return {
+        "update_interval": entry.options.get("update_interval", entry.data["update_interval"]),
+        "slow_update_interval": entry.options.get(CONF_KEY_SLOW_INTERVAL, CONF_SLOW_INTERVAL_DEFAULT),
+        "adaptive": entry.options.get(CONF_KEY_ADAPTIVE, CONF_ADAPTIVE_DEFAULT),
+        "max_update_interval": entry.options.get(CONF_KEY_MAX_INTERVAL, CONF_MAX_INTERVAL_DEFAULT),
+        "usage_limit": entry.options.get(CONF_KEY_USAGE_LIMIT, CONF_USAGE_LIMIT_DEFAULT),
+        "usage_threshold": entry.options.get(CONF_KEY_USAGE_THRESHOLD, CONF_USAGE_THRESHOLD_DEFAULT),
+        "max_concurrency": entry.options.get(CONF_KEY_CONCURRENCY, CONF_CONCURRENCY_DEFAULT),
+        "request_timeout": entry.options.get(CONF_KEY_REQUEST_TIMEOUT, CONF_REQUEST_TIMEOUT_DEFAULT),
+        "request_interval": entry.options.get(CONF_KEY_REQUEST_INTERVAL, CONF_REQUEST_INTERVAL_DEFAULT),
+        "slow_call_threshold": entry.options.get(
+            CONF_KEY_SLOW_CALL_THRESHOLD, CONF_SLOW_CALL_THRESHOLD_DEFAULT)
+    }
+
+
+async def _async_login(hass: HomeAssistant, entry: FamilySafetyConfigEntry):
+    """Log in in the background while entities are served from the cached snapshot."""
+    delay = LOGIN_RETRY_DELAY
+    while True:
+        try:
+            familysafety = await _async_create_api(hass, entry)
+        except Unauthorized:
+            entry.async_start_reauth(hass)
+            return
+        except Exception as err:
+            if isinstance(err, AggregatorException):
+                _LOGGER.error(AGG_ERROR)
+            _LOGGER.warning("Unable to login, retrying in %s seconds: %s", delay, err)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LOGIN_RETRY_MAX_DELAY)
+            continue
+        _LOGGER.debug("Background login successful, replacing cached data.")
+        entry.runtime_data.set_api(familysafety)
+        entry.runtime_data.async_set_updated_data(entry.runtime_data.data)
+        return
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: FamilySafetyConfigEntry) -> bool:
     """Create ConfigEntry."""
     hass.data.setdefault(DOMAIN, {})
     _LOGGER.debug("Got request to setup entry.")
-    try:
-        familysafety = await FamilySafety.create(
-            token=entry.options.get(
-                "refresh_token", entry.options.get("refresh_token", entry.data.get("refresh_token"))),
-            use_refresh_token=True,
-            experimental=entry.options.get(CONF_KEY_EXPR, CONF_EXPR_DEFAULT)
-        )
-        _LOGGER.debug("Login successful, setting up coordinator.")
-        entry.runtime_data = FamilySafetyCoordinator(
-            hass,
-            familysafety,
-            entry.options.get("update_interval", entry.data["update_interval"]))
-        # no need to fetch initial data as this is already handled on creation
-    except AggregatorException as err:
-        _LOGGER.error(AGG_ERROR)
-        raise CannotConnect from err
-    except Unauthorized as err:
-        raise ConfigEntryAuthFailed from err
-    except HttpException as err:
-        _LOGGER.error(err)
-        raise CannotConnect from err
-    except Exception as err:
-        _LOGGER.error(err)
-        raise CannotConnect from err
+    familysafety = None
+    snapshot = await async_load_snapshot(hass, entry.entry_id)
+    if snapshot is None:
+        try:
+            familysafety = await _async_create_api(hass, entry)
+            _LOGGER.debug("Login successful, setting up coordinator.")
+            # no need to fetch initial data as this is already handled on creation
+        except AggregatorException as err:
+            _LOGGER.error(AGG_ERROR)
+            raise CannotConnect from err
+        except Unauthorized as err:
+            raise ConfigEntryAuthFailed from err
+        except HttpException as err:
+            _LOGGER.error(err)
+            raise CannotConnect from err
+        except Exception as err:
+            _LOGGER.error(err)
+            raise CannotConnect from err
+    else:
+        _LOGGER.debug("Setting up coordinator from cached data.")
+
+    entry.runtime_data = FamilySafetyCoordinator(
+        hass,
+        familysafety,
+        snapshot=snapshot,
+        **_coordinator_options(entry))
+    await entry.runtime_data.catalog.async_load()
+    entry.runtime_data.catalog.async_update_accounts(entry.runtime_data.data.accounts.values())
+    await entry.runtime_data.history.async_load()
+    if familysafety is None:
+        entry.async_create_background_task(
+            hass, _async_login(hass, entry), f"{DOMAIN}_login_{entry.entry_id}")
+
+    experimental = entry.options.get(CONF_KEY_EXPR, CONF_EXPR_DEFAULT)
+    import_statistics = entry.options.get(CONF_KEY_STATISTICS, CONF_STATISTICS_DEFAULT)
+    applied_options = _options_without_token(entry.options)
+    if import_statistics:
+        entry.async_on_unload(StatisticsImporter(hass, entry.runtime_data).async_start())
 
     async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
-        """Update listener."""
-        await hass.config_entries.async_reload(entry.entry_id)
+        """Apply changed options, only reloading for a new token, experimental features or statistics."""
+        nonlocal applied_options
+        if (entry.options.get(CONF_KEY_EXPR, CONF_EXPR_DEFAULT) != experimental) or (
+            entry.options.get(CONF_KEY_STATISTICS, CONF_STATISTICS_DEFAULT) != import_statistics
+        ) or (
+            entry.options.get("refresh_token") != entry.runtime_data.token_manager.refresh_token
+            and entry.runtime_data.api is not None
+        ):
+            await hass.config_entries.async_reload(entry.entry_id)
+            return
+        if _options_without_token(entry.options) == applied_options:
+            # the token manager persisted a rotated refresh token.
+            return
+        applied_options = _options_without_token(entry.options)
+        # platforms add and remove account and application entities in place.
+        entry.runtime_data.async_apply_options(**_coordinator_options(entry))
 
     entry.async_on_unload(entry.add_update_listener(update_listener))
 
+    async_track_removed_accounts(hass, entry)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
 
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+async def async_unload_entry(hass: HomeAssistant, entry: FamilySafetyConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.debug("Unloading config entry %s", entry.entry_id)
-    await hass.data[DOMAIN][entry.entry_id].api.api.end_session()
-    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+    if entry.runtime_data.api is not None:
+        await entry.runtime_data.api.api.end_session()
+    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+
 
-    return unload_ok
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached snapshot, application catalog and usage history of a deleted config entry."""
+    await snapshot_store(hass, entry.entry_id).async_remove()
+    await ApplicationCatalog(hass, entry.entry_id).async_remove()
+    await UsageHistory(hass, entry.entry_id).async_remove()
 
 
 class CannotConnect(HomeAssistantError):
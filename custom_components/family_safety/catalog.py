@@ -0,0 +1,169 @@
+"""Family wide catalog of applications used by any account."""
+
+import bisect
+import logging
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STORAGE_VERSION, STORAGE_SAVE_DELAY
+from .snapshot import AccountSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+_TOKEN_SPLIT = re.compile(r"[^\w]+")
+
+
+def _tokenize(text: str) -> set[str]:
+    """Return the lower case words of a name or query."""
+    return {t for t in _TOKEN_SPLIT.split(text.lower()) if t}
+
+
+@dataclass(slots=True)
+class CatalogEntry:
+    """A single application with its usage today by account."""
+
+    app_id: str
+    name: str
+    icon: str | None = None
+    usage: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total_usage(self) -> float:
+        """Return the usage in minutes across all accounts."""
+        return sum(self.usage.values())
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable dict."""
+        return {
+            "app_id": self.app_id,
+            "name": self.name,
+            "icon": self.icon,
+            "usage": self.usage
+        }
+
+
+class ApplicationCatalog:
+    """Applications of all accounts deduplicated by ID with a search index.
+
+    The catalog is updated incrementally from the accounts refreshed by the
+    coordinator and persisted so it is available straight after a restart.
+    Names are indexed by word, a query matches applications with a word
+    starting with each word of the query. Results are ranked by usage.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Create an ApplicationCatalog."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.catalog")
+        self._entries: dict[str, CatalogEntry] = {}
+        self._index: dict[str, set[str]] = {}
+        # sorted words of the index for prefix lookups.
+        self._tokens: list[str] = []
+
+    def __len__(self) -> int:
+        """Return the number of applications."""
+        return len(self._entries)
+
+    def get(self, app_id: str) -> CatalogEntry | None:
+        """Return a single application."""
+        return self._entries.get(app_id)
+
+    async def async_load(self) -> None:
+        """Load the persisted catalog."""
+        data = await self._store.async_load()
+        if data is None:
+            return
+        for app in data.get("applications", []):
+            if app.get("app_id") in self._entries:
+                # already collected since starting.
+                continue
+            try:
+                self._add(CatalogEntry(**app))
+            except TypeError as err:
+                _LOGGER.debug("Ignoring invalid catalog entry %s: %s", app, err)
+
+    async def async_remove(self) -> None:
+        """Remove the persisted catalog."""
+        await self._store.async_remove()
+
+    def _data_to_store(self) -> dict:
+        """Return the catalog to persist."""
+        return {"applications": [e.as_dict() for e in self._entries.values()]}
+
+    def _add(self, entry: CatalogEntry) -> None:
+        """Add an application to the catalog and index."""
+        self._entries[entry.app_id] = entry
+        for token in _tokenize(entry.name):
+            if token not in self._index:
+                self._index[token] = set()
+                bisect.insort(self._tokens, token)
+            self._index[token].add(entry.app_id)
+
+    def _remove_from_index(self, entry: CatalogEntry) -> None:
+        """Remove the name of an application from the index."""
+        for token in _tokenize(entry.name):
+            app_ids = self._index.get(token)
+            if app_ids is None:
+                continue
+            app_ids.discard(entry.app_id)
+            if not app_ids:
+                del self._index[token]
+                self._tokens.pop(bisect.bisect_left(self._tokens, token))
+
+    @callback
+    def async_update_accounts(self, accounts: Iterable[AccountSnapshot]) -> None:
+        """Merge the applications of refreshed accounts into the catalog."""
+        changed = False
+        for account in accounts:
+            for app in account.applications.values():
+                entry = self._entries.get(app.app_id)
+                if entry is None:
+                    self._add(CatalogEntry(app.app_id, app.name, app.icon, {account.user_id: app.usage}))
+                    changed = True
+                    continue
+                if entry.name != app.name:
+                    self._remove_from_index(entry)
+                    entry.name = app.name
+                    self._add(entry)
+                    changed = True
+                if entry.icon != app.icon or entry.usage.get(account.user_id) != app.usage:
+                    entry.icon = app.icon
+                    entry.usage[account.user_id] = app.usage
+                    changed = True
+        if changed:
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+    def _match_token(self, prefix: str) -> set[str]:
+        """Return the applications with a word starting with prefix."""
+        matches: set[str] = set()
+        for idx in range(bisect.bisect_left(self._tokens, prefix), len(self._tokens)):
+            token = self._tokens[idx]
+            if not token.startswith(prefix):
+                break
+            matches.update(self._index[token])
+        return matches
+
+    def search(self,
+               query: str = "",
+               offset: int = 0,
+               limit: int | None = None) -> tuple[list[CatalogEntry], int]:
+        """Return a page of applications matching a query and the total number of matches."""
+        tokens = _tokenize(query)
+        if tokens:
+            matches: set[str] | None = None
+            # start with the most selective word.
+            for token in sorted(tokens, key=len, reverse=True):
+                found = self._match_token(token)
+                matches = found if matches is None else matches & found
+                if not matches:
+                    break
+            entries = [self._entries[a] for a in matches or ()]
+        else:
+            entries = list(self._entries.values())
+        entries.sort(key=lambda e: (-e.total_usage, e.name.lower()))
+        end = None if limit is None else offset + limit
+        return entries[offset:end], len(entries)
@@ -0,0 +1,60 @@
+"""Create Family Safety clients using Home Assistant's connection pool."""
+
+from typing import Any
+
+import aiohttp
+
+from pyfamilysafety import FamilySafety
+from pyfamilysafety.account import Account
+from pyfamilysafety.api import FamilySafetyAPI
+from pyfamilysafety.authenticator import Authenticator
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+
+async def async_create_client(
+    hass: HomeAssistant,
+    token: str,
+    experimental: bool = False
+) -> FamilySafety:
+    """Log in and collect all data, equivalent to FamilySafety.create.
+
+    pyfamilysafety sets the authorization header on its session, so each client
+    has its own session. The session shares Home Assistant's connector so TLS
+    connections are pooled and kept alive across config entries and flows.
+    """
+    api = FamilySafetyAPI()
+    # replace the session created by the library before any request is sent.
+    await api._session.close()
+    api._session = aiohttp.ClientSession(
+        connector=async_get_clientsession(hass).connector,
+        connector_owner=False
+    )
+    try:
+        api.authenticator = await Authenticator.create(token, use_refresh_token=True)
+        family_safety = FamilySafety(api)
+        accounts = await api.send_request("get_accounts")
+        family_safety.accounts = await Account.from_dict(api, accounts.get("json"), experimental)
+        family_safety.experimental = experimental
+        if experimental:
+            await family_safety._get_pending_requests()
+    except Exception:
+        await api.end_session()
+        raise
+    return family_safety
+
+
+def session_stats(family_safety: FamilySafety | None) -> dict[str, Any]:
+    """Return connection pool settings of a client, from public connector attributes only."""
+    if family_safety is None:
+        return {}
+    connector = family_safety.api._session.connector
+    if connector is None:
+        return {"closed": True}
+    return {
+        "closed": connector.closed,
+        "shared": not family_safety.api._session.connector_owner,
+        "limit": connector.limit,
+        "limit_per_host": connector.limit_per_host
+    }
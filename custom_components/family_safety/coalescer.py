@@ -0,0 +1,108 @@
+"""Coalesces commands sent to the Family Safety API per account."""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, COMMAND_COALESCE_WINDOW, Resource
+
+_LOGGER = logging.getLogger(__name__)
+
+type Command = Callable[[], Awaitable[Any]]
+# the resource a command changes and the item it changes, e.g. an app or platform.
+type Target = tuple[Resource, Hashable]
+
+
+def _cancel_futures(commands: dict[Target, tuple[Command, list[asyncio.Future]]]) -> None:
+    """Cancel the futures of commands that will not be sent."""
+    for _, futures in commands.values():
+        for future in futures:
+            if not future.done():
+                future.cancel()
+
+
+class CommandCoalescer:
+    """Collects the commands of an account over a short window and sends them together.
+
+    The API has no batch endpoint, so once the window has passed the queued
+    commands are sent concurrently. A later command for the same target
+    replaces one still waiting to be sent, for example blocking and then
+    unblocking an application only sends the unblock. Targets start with the
+    resource a command changes, after all commands of an account were sent
+    those resources of the account are refreshed once.
+    """
+
+    def __init__(self,
+                 hass: HomeAssistant,
+                 entry: ConfigEntry,
+                 send: Callable[[Command], Awaitable[Any]],
+                 on_sent: Callable[[str, set[Resource]], Awaitable[None]],
+                 window: float = COMMAND_COALESCE_WINDOW) -> None:
+        """Create a CommandCoalescer."""
+        self._hass = hass
+        self._entry = entry
+        self._send = send
+        self._on_sent = on_sent
+        self._window = window
+        self._pending: dict[str, dict[Target, tuple[Command, list[asyncio.Future]]]] = {}
+        self._flushing: set[str] = set()
+
+    async def async_send(self,
+                         user_id: str,
+                         target: Target,
+                         command: Command) -> None:
+        """Queue a command for an account and wait until it was sent."""
+        future = self._hass.loop.create_future()
+        pending = self._pending.setdefault(user_id, {})
+        _, futures = pending.get(target, (None, []))
+        futures.append(future)
+        pending[target] = (command, futures)
+        if user_id not in self._flushing:
+            self._flushing.add(user_id)
+            self._entry.async_create_background_task(
+                self._hass, self._async_flush(user_id), f"{DOMAIN}_commands_{user_id}")
+        await future
+
+    async def _async_flush(self, user_id: str) -> None:
+        """Send the queued commands of an account.
+
+        Commands queued while sending are sent after the next window, so
+        commands for the same target are never sent out of order.
+        """
+        try:
+            while self._pending.get(user_id):
+                await asyncio.sleep(self._window)
+                await self._async_send_pending(user_id)
+        finally:
+            self._flushing.discard(user_id)
+            # cancelled when the entry unloads, callers must not wait forever.
+            _cancel_futures(self._pending.pop(user_id, {}))
+
+    async def _async_send_pending(self, user_id: str) -> None:
+        """Send the commands queued for an account and refresh it."""
+        commands = self._pending.pop(user_id, {})
+        _LOGGER.debug("Sending %s commands for %s", len(commands), user_id)
+        try:
+            results = await asyncio.gather(
+                *(self._send(command) for command, _ in commands.values()),
+                return_exceptions=True
+            )
+            try:
+                await self._on_sent(user_id, {target[0] for target in commands})
+            except Exception as err:
+                _LOGGER.warning("Failed to refresh %s after sending commands: %s", user_id, err)
+        except asyncio.CancelledError:
+            _cancel_futures(commands)
+            raise
+        for (_, futures), result in zip(commands.values(), results):
+            for future in futures:
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(None)
@@ -1,23 +1,47 @@
 """Config flow for MSFT Family Safety."""
 
-import contextlib
 import logging
+from collections.abc import Callable
 from typing import Any
 
-from pyfamilysafety import FamilySafety
 from pyfamilysafety.authenticator import Authenticator
 from pyfamilysafety.exceptions import HttpException
-from pyfamilysafety.application import Application
-from pyfamilysafety.account import Account
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.config_entries import ConfigEntryState
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import selector
 
-from .const import DOMAIN, CONF_EXPR_DEFAULT, CONF_KEY_EXPR
+from .const import (
+    DOMAIN,
+    CONF_EXPR_DEFAULT,
+    CONF_KEY_EXPR,
+    CONF_KEY_SLOW_INTERVAL,
+    CONF_SLOW_INTERVAL_DEFAULT,
+    CONF_KEY_ADAPTIVE,
+    CONF_ADAPTIVE_DEFAULT,
+    CONF_KEY_MAX_INTERVAL,
+    CONF_MAX_INTERVAL_DEFAULT,
+    CONF_KEY_USAGE_LIMIT,
+    CONF_USAGE_LIMIT_DEFAULT,
+    CONF_KEY_USAGE_THRESHOLD,
+    CONF_USAGE_THRESHOLD_DEFAULT,
+    CONF_KEY_CONCURRENCY,
+    CONF_CONCURRENCY_DEFAULT,
+    CONF_KEY_REQUEST_TIMEOUT,
+    CONF_REQUEST_TIMEOUT_DEFAULT,
+    CONF_KEY_REQUEST_INTERVAL,
+    CONF_REQUEST_INTERVAL_DEFAULT,
+    CONF_KEY_SLOW_CALL_THRESHOLD,
+    CONF_SLOW_CALL_THRESHOLD_DEFAULT,
+    CONF_KEY_STATISTICS,
+    CONF_STATISTICS_DEFAULT,
+    CATALOG_PAGE_SIZE
+)
+from .snapshot import FamilySnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,24 +53,32 @@ CONFIG_SCHEMA = vol.Schema(
 )
 
 
-def _get_application_id(name: str, applications: list[Application]):
-    """Return the single application ID."""
-    return [a for a in applications if a.name == name][0].app_id
-
-
-def _convert_applications(applications: list[Application]):
-    """Convert a list of applications to an array for options."""
-    return [a.name for a in applications]
-
-
-def _convert_accounts(accounts: list[Account]):
-    """Convert a list of accounts to an array for options."""
-    return [f"{a.first_name} {a.surname}" for a in accounts]
+# options of an entry with their default and validator, in the order they are stored.
+OPTIONS: tuple[tuple[str, Any, Callable[[Any], Any]], ...] = (
+    ("refresh_token", None, str),
+    ("update_interval", 60, int),
+    (CONF_KEY_SLOW_INTERVAL, CONF_SLOW_INTERVAL_DEFAULT, int),
+    (CONF_KEY_ADAPTIVE, CONF_ADAPTIVE_DEFAULT, bool),
+    (CONF_KEY_MAX_INTERVAL, CONF_MAX_INTERVAL_DEFAULT, int),
+    (CONF_KEY_CONCURRENCY, CONF_CONCURRENCY_DEFAULT, int),
+    (CONF_KEY_REQUEST_TIMEOUT, CONF_REQUEST_TIMEOUT_DEFAULT, int),
+    (CONF_KEY_REQUEST_INTERVAL, CONF_REQUEST_INTERVAL_DEFAULT, int),
+    (CONF_KEY_SLOW_CALL_THRESHOLD, CONF_SLOW_CALL_THRESHOLD_DEFAULT, float),
+    ("tracked_applications", [], list),
+    (CONF_KEY_USAGE_LIMIT, CONF_USAGE_LIMIT_DEFAULT, int),
+    (CONF_KEY_USAGE_THRESHOLD, CONF_USAGE_THRESHOLD_DEFAULT, float),
+    (CONF_KEY_STATISTICS, CONF_STATISTICS_DEFAULT, bool),
+    ("accounts", [], list),
+    (CONF_KEY_EXPR, CONF_EXPR_DEFAULT, bool)
+)
 
 
-def _get_account_id(name: str, accounts: list[Account]):
-    """Return the account ID."""
-    return [a for a in accounts if (f"{a.first_name} {a.surname}" == name)][0].user_id
+def _convert_accounts(snapshot: FamilySnapshot) -> list[selector.SelectOptionDict]:
+    """Convert the accounts to options, keyed by user ID."""
+    return [
+        selector.SelectOptionDict(value=a.user_id, label=f"{a.first_name} {a.surname}")
+        for a in snapshot.accounts.values()
+    ]
 
 
 async def validate_input(data: dict[str, Any]) -> dict[str, Any]:
@@ -111,9 +143,27 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
 
 class OptionsFlow(config_entries.OptionsFlowWithConfigEntry):
-    """An options flow for HASS."""
+    """An options flow for HASS.
 
-    family_safety: FamilySafety = None
+    Accounts and applications are read from the snapshot and application
+    catalog of the running coordinator rather than logging in again.
+    """
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Create the options flow."""
+        super().__init__(config_entry)
+        self._tracked_applications: list[str] | None = None
+        self._shown_applications: set[str] = set()
+        self._usage_input: dict[str, Any] = {}
+        self._search = ""
+        self._page = 0
+
+    @property
+    def _snapshot(self) -> FamilySnapshot | None:
+        """Return the snapshot of the loaded config entry."""
+        if self.config_entry.state is not ConfigEntryState.LOADED:
+            return None
+        return self.config_entry.runtime_data.data
 
     def _get_config_entry(self, key):
         """Return the specific config entry."""
@@ -126,42 +176,13 @@ class OptionsFlow(config_entries.OptionsFlowWithConfigEntry):
 
     async def async_create_entry(self, **kwargs) -> config_entries.FlowResult:
         """Create an entry using optional overrides."""
-        update_interval = self._get_config_entry("update_interval")
-        if kwargs.get("update_interval", None) is not None:
-            update_interval = kwargs.get("update_interval")
-        if update_interval is None:
-            update_interval = 60
-
-        refresh_token = self._get_config_entry("refresh_token")
-        if kwargs.get("refresh_token", None) is not None:
-            refresh_token = kwargs.get("refresh_token")
-
-        tracked_applications = self._get_config_entry("tracked_applications")
-        if kwargs.get("tracked_applications", None) is not None:
-            tracked_applications = kwargs.get("tracked_applications")
-        if tracked_applications is None:
-            tracked_applications = []
-
-        accounts = self._get_config_entry("accounts")
-        if kwargs.get("accounts", None) is not None:
-            accounts = kwargs.get("accounts")
-        if accounts is None:
-            accounts = []
-
-        expr = self._get_config_entry(CONF_KEY_EXPR)
-        if kwargs.get(CONF_KEY_EXPR, None) is not None:
-            expr = kwargs[CONF_KEY_EXPR]
-        if expr is None:
-            expr = CONF_EXPR_DEFAULT
-
-        await self.family_safety.api.end_session()
-        self.options.update({
-            "refresh_token": refresh_token,
-            "update_interval": update_interval,
-            "tracked_applications": tracked_applications,
-            "accounts": accounts,
-            CONF_KEY_EXPR: expr
-        })
+        for key, default, validator in OPTIONS:
+            value = kwargs.get(key)
+            if value is None:
+                value = self._get_config_entry(key)
+            if value is None:
+                value = default
+            self.options[key] = value if value is None else validator(value)
         return super().async_create_entry(
             title=self.config_entry.title,
             data=self.options
@@ -172,9 +193,16 @@ class OptionsFlow(config_entries.OptionsFlowWithConfigEntry):
     ) -> config_entries.FlowResult:
         """Auth step."""
         if user_input is not None:
-            return await self._async_create_entry(
+            return await self.async_create_entry(
                 refresh_token=user_input["refresh_token"],
-                update_interval=user_input["update_interval"]
+                update_interval=user_input["update_interval"],
+                slow_update_interval=user_input[CONF_KEY_SLOW_INTERVAL],
+                adaptive_interval=user_input[CONF_KEY_ADAPTIVE],
+                max_update_interval=user_input[CONF_KEY_MAX_INTERVAL],
+                max_concurrent_requests=user_input[CONF_KEY_CONCURRENCY],
+                request_timeout=user_input[CONF_KEY_REQUEST_TIMEOUT],
+                request_update_interval=user_input[CONF_KEY_REQUEST_INTERVAL],
+                slow_call_threshold=user_input[CONF_KEY_SLOW_CALL_THRESHOLD]
             )
 
         refresh_token = self.config_entry.data["refresh_token"]
@@ -187,11 +215,53 @@ class OptionsFlow(config_entries.OptionsFlowWithConfigEntry):
             update_interval = self.config_entry.options.get(
                 "update_interval", update_interval)
 
+        slow_update_interval = self._get_config_entry(CONF_KEY_SLOW_INTERVAL)
+        if slow_update_interval is None:
+            slow_update_interval = CONF_SLOW_INTERVAL_DEFAULT
+
+        adaptive = self._get_config_entry(CONF_KEY_ADAPTIVE)
+        if adaptive is None:
+            adaptive = CONF_ADAPTIVE_DEFAULT
+
+        max_update_interval = self._get_config_entry(CONF_KEY_MAX_INTERVAL)
+        if max_update_interval is None:
+            max_update_interval = CONF_MAX_INTERVAL_DEFAULT
+
+        max_concurrency = self._get_config_entry(CONF_KEY_CONCURRENCY)
+        if max_concurrency is None:
+            max_concurrency = CONF_CONCURRENCY_DEFAULT
+
+        request_timeout = self._get_config_entry(CONF_KEY_REQUEST_TIMEOUT)
+        if request_timeout is None:
+            request_timeout = CONF_REQUEST_TIMEOUT_DEFAULT
+
+        request_interval = self._get_config_entry(CONF_KEY_REQUEST_INTERVAL)
+        if request_interval is None:
+            request_interval = CONF_REQUEST_INTERVAL_DEFAULT
+
+        slow_call_threshold = self._get_config_entry(CONF_KEY_SLOW_CALL_THRESHOLD)
+        if slow_call_threshold is None:
+            slow_call_threshold = CONF_SLOW_CALL_THRESHOLD_DEFAULT
+
         return self.async_show_form(
             step_id="auth",
             data_schema=vol.Schema(
                 {
                     vol.Required("update_interval", default=update_interval): int,
+                    vol.Required(CONF_KEY_SLOW_INTERVAL,
+                                 default=slow_update_interval): int,
+                    vol.Required(CONF_KEY_ADAPTIVE,
+                                 default=adaptive): selector.BooleanSelector(),
+                    vol.Required(CONF_KEY_MAX_INTERVAL,
+                                 default=max_update_interval): int,
+                    vol.Required(CONF_KEY_CONCURRENCY,
+                                 default=max_concurrency): int,
+                    vol.Required(CONF_KEY_REQUEST_TIMEOUT,
+                                 default=request_timeout): int,
+                    vol.Required(CONF_KEY_REQUEST_INTERVAL,
+                                 default=request_interval): int,
+                    vol.Required(CONF_KEY_SLOW_CALL_THRESHOLD,
+                                 default=slow_call_threshold): vol.Coerce(float),
                     vol.Required("refresh_token",
                                  default=refresh_token): str
                 }
@@ -201,39 +271,95 @@ class OptionsFlow(config_entries.OptionsFlowWithConfigEntry):
     async def async_step_applications(
             self, user_input: dict[str, Any] | None = None
     ) -> config_entries.FlowResult:
-        """Application configuration step."""
+        """Application configuration step.
+
+        Applications are paged from the family wide catalog, most used first.
+        Searching or moving to the next page shows the form again, keeping
+        the applications selected so far.
+        """
+        if self._tracked_applications is None:
+            self._tracked_applications = list(
+                self._get_config_entry("tracked_applications") or [])
         if user_input is not None:
-            tracked_applications = []
-            applications = self.family_safety.accounts[0].applications
-            for app in user_input.get("tracked_applications", []):
-                tracked_applications.append(
-                    _get_application_id(app, applications))
-            return await self.async_create_entry(
-                tracked_applications=tracked_applications
-            )
-
-        default_tracked_applications = []
-        tracked_applications = self._get_config_entry("tracked_applications")
-        if tracked_applications is None:
-            tracked_applications = []
-        for app in tracked_applications:
-            with contextlib.suppress(IndexError):
-                default_tracked_applications.append(
-                    self.family_safety.accounts[0].get_application(app).name
+            selected = user_input.get("tracked_applications", [])
+            self._tracked_applications = [
+                a for a in self._tracked_applications
+                if a not in self._shown_applications or a in selected
+            ] + [a for a in selected if a not in self._tracked_applications]
+            self._usage_input = {
+                CONF_KEY_USAGE_LIMIT: user_input.get(CONF_KEY_USAGE_LIMIT),
+                CONF_KEY_USAGE_THRESHOLD: user_input.get(CONF_KEY_USAGE_THRESHOLD),
+                CONF_KEY_STATISTICS: user_input.get(CONF_KEY_STATISTICS)
+            }
+            search = user_input.get("search", "")
+            if search == self._search and not user_input.get("next_page"):
+                return await self.async_create_entry(
+                    tracked_applications=self._tracked_applications,
+                    usage_attribute_limit=user_input.get(CONF_KEY_USAGE_LIMIT),
+                    usage_attribute_threshold=user_input.get(CONF_KEY_USAGE_THRESHOLD),
+                    import_statistics=user_input.get(CONF_KEY_STATISTICS)
                 )
+            self._page = self._page + 1 if search == self._search else 0
+            self._search = search
+
+        usage_limit = self._usage_input.get(CONF_KEY_USAGE_LIMIT)
+        if usage_limit is None:
+            usage_limit = self._get_config_entry(CONF_KEY_USAGE_LIMIT)
+        if usage_limit is None:
+            usage_limit = CONF_USAGE_LIMIT_DEFAULT
+
+        usage_threshold = self._usage_input.get(CONF_KEY_USAGE_THRESHOLD)
+        if usage_threshold is None:
+            usage_threshold = self._get_config_entry(CONF_KEY_USAGE_THRESHOLD)
+        if usage_threshold is None:
+            usage_threshold = CONF_USAGE_THRESHOLD_DEFAULT
+
+        import_statistics = self._usage_input.get(CONF_KEY_STATISTICS)
+        if import_statistics is None:
+            import_statistics = self._get_config_entry(CONF_KEY_STATISTICS)
+        if import_statistics is None:
+            import_statistics = CONF_STATISTICS_DEFAULT
+
+        catalog = self.config_entry.runtime_data.catalog
+        page, total = catalog.search(
+            self._search, self._page * CATALOG_PAGE_SIZE, CATALOG_PAGE_SIZE)
+        if not page and self._page:
+            # back to the first page after the last one.
+            self._page = 0
+            page, total = catalog.search(self._search, 0, CATALOG_PAGE_SIZE)
+        options = [selector.SelectOptionDict(value=e.app_id, label=e.name) for e in page]
+        shown = {e.app_id for e in page}
+        # tracked applications stay selectable on every page.
+        for app_id in self._tracked_applications:
+            if app_id not in shown:
+                entry = catalog.get(app_id)
+                options.append(selector.SelectOptionDict(
+                    value=app_id, label=app_id if entry is None else entry.name))
+        self._shown_applications = {o["value"] for o in options}
 
         return self.async_show_form(
             step_id="applications",
             data_schema=vol.Schema({
+                vol.Optional("search", default=self._search): str,
                 vol.Optional("tracked_applications",
-                             default=default_tracked_applications): selector.SelectSelector(
+                             default=self._tracked_applications): selector.SelectSelector(
                     selector.SelectSelectorConfig(
-                        options=_convert_applications(
-                            self.family_safety.accounts[0].applications),
+                        options=options,
                         custom_value=False,
-                        multiple=True)
-                )
-            })
+                        multiple=True,
+                        mode=selector.SelectSelectorMode.DROPDOWN)
+                ),
+                vol.Optional("next_page", default=False): selector.BooleanSelector(),
+                vol.Optional(CONF_KEY_USAGE_LIMIT, default=usage_limit): int,
+                vol.Optional(CONF_KEY_USAGE_THRESHOLD, default=usage_threshold): vol.Coerce(float),
+                vol.Optional(CONF_KEY_STATISTICS,
+                             default=import_statistics): selector.BooleanSelector()
+            }),
+            description_placeholders={
+                "first": str(min(self._page * CATALOG_PAGE_SIZE + 1, total)),
+                "last": str(self._page * CATALOG_PAGE_SIZE + len(page)),
+                "total": str(total)
+            }
         )
 
     async def async_step_accounts(
@@ -242,26 +368,16 @@ class OptionsFlow(config_entries.OptionsFlowWithConfigEntry):
         """Accounts step."""
 
         if user_input is not None:
-            tracked_user_ids = []
-            with contextlib.suppress(IndexError):
-                for user in user_input.get("accounts", []):
-                    tracked_user_ids.append(
-                        _get_account_id(user, self.family_safety.accounts)
-                    )
             return await self.async_create_entry(
-                accounts=tracked_user_ids,
+                accounts=user_input.get("accounts", []),
                 experimental=user_input.get(CONF_KEY_EXPR, CONF_EXPR_DEFAULT)
             )
 
-        default_tracked_accounts = []
         tracked_accounts = self._get_config_entry("accounts")
         if tracked_accounts is None:
             tracked_accounts = []
-        for account in tracked_accounts:
-            with contextlib.suppress(IndexError):
-                acc = self.family_safety.get_account(account)
-                default_tracked_accounts.append(
-                    f"{acc.first_name} {acc.surname}")
+        default_tracked_accounts = [
+            a for a in tracked_accounts if a in self._snapshot.accounts]
 
         return self.async_show_form(
             step_id="accounts",
@@ -270,8 +386,7 @@ class OptionsFlow(config_entries.OptionsFlowWithConfigEntry):
                     vol.Optional("accounts",
                                  default=default_tracked_accounts): selector.SelectSelector(
                                      selector.SelectSelectorConfig(
-                                         options=_convert_accounts(
-                                             self.family_safety.accounts),
+                                         options=_convert_accounts(self._snapshot),
                                          custom_value=False,
                                          multiple=True
                                      )
@@ -285,10 +400,9 @@ class OptionsFlow(config_entries.OptionsFlowWithConfigEntry):
         self, user_input: dict[str, Any] | None = None
     ) -> config_entries.FlowResult:
         """First step."""
-        self.family_safety = await FamilySafety.create(
-            token=self.config_entry.data["refresh_token"],
-            use_refresh_token=True
-        )
+        if self._snapshot is None:
+            # accounts and applications are only known once the entry is loaded.
+            return self.async_show_menu(step_id="init", menu_options=["auth"])
         return self.async_show_menu(
             step_id="init",
             menu_options=["auth", "applications", "accounts"]
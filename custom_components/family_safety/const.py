@@ -1,4 +1,6 @@
 """Constants for integration_blueprint."""
+from datetime import time, timedelta
+from enum import StrEnum
 from logging import Logger, getLogger
 from pyfamilysafety.account import OverrideTarget
 
@@ -7,9 +9,104 @@ LOGGER: Logger = getLogger(__package__)
 NAME = "Microsoft Family Safety"
 DOMAIN = "family_safety"
 
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 30
+
+# initial and maximum delay between background login attempts.
+LOGIN_RETRY_DELAY = 60
+LOGIN_RETRY_MAX_DELAY = 900
+
+# refresh the access token this many seconds before it expires.
+TOKEN_REFRESH_MARGIN = 300
+TOKEN_RETRY_DELAY = 60
+
 CONF_KEY_EXPR = "experimental"
 CONF_EXPR_DEFAULT = False
 
+CONF_KEY_SLOW_INTERVAL = "slow_update_interval"
+CONF_SLOW_INTERVAL_DEFAULT = 900
+
+CONF_KEY_ADAPTIVE = "adaptive_interval"
+CONF_ADAPTIVE_DEFAULT = False
+CONF_KEY_MAX_INTERVAL = "max_update_interval"
+CONF_MAX_INTERVAL_DEFAULT = 1800
+
+CONF_KEY_USAGE_LIMIT = "usage_attribute_limit"
+CONF_USAGE_LIMIT_DEFAULT = 0
+CONF_KEY_USAGE_THRESHOLD = "usage_attribute_threshold"
+CONF_USAGE_THRESHOLD_DEFAULT = 0
+
+CONF_KEY_CONCURRENCY = "max_concurrent_requests"
+CONF_CONCURRENCY_DEFAULT = 4
+CONF_KEY_REQUEST_TIMEOUT = "request_timeout"
+CONF_REQUEST_TIMEOUT_DEFAULT = 20
+
+CONF_KEY_REQUEST_INTERVAL = "request_update_interval"
+CONF_REQUEST_INTERVAL_DEFAULT = 0
+
+# log API calls slower than this many seconds, 0 to disable.
+CONF_KEY_SLOW_CALL_THRESHOLD = "slow_call_threshold"
+CONF_SLOW_CALL_THRESHOLD_DEFAULT = 0
+
+CONF_KEY_STATISTICS = "import_statistics"
+CONF_STATISTICS_DEFAULT = False
+
+# attempts per API call and the base/maximum backoff between them in seconds.
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 30
+
+# consecutive updates with aggregator errors before the API is no longer called.
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_TIMEOUT = timedelta(minutes=5)
+CIRCUIT_MAX_RESET_TIMEOUT = timedelta(hours=1)
+
+# seconds to collect commands for an account before sending them.
+COMMAND_COALESCE_WINDOW = 0.5
+
+# requests per second shared by all config entries and the burst allowed above it.
+REQUEST_BUDGET_RATE = 1.0
+REQUEST_BUDGET_BURST = 60
+
+# endpoints whose responses are compared with the previous response, and the
+# seconds after which a cached response is replaced even if unchanged.
+RESPONSE_CACHE_ENDPOINTS = frozenset({
+    "get_accounts",
+    "get_user_app_screentime_usage",
+    "get_user_devices",
+    "get_override_device_restrictions",
+    "get_user_spending"
+})
+RESPONSE_CACHE_TTL = 3600
+
+# hours of usage history kept for each account, application and device.
+HISTORY_RETENTION_HOURS = 8 * 24
+
+# number of recent durations kept for each phase and endpoint.
+METRICS_WINDOW = 100
+
+# diagnostics keep the first items of long lists and characters of long strings.
+DIAGNOSTICS_MAX_ITEMS = 10
+DIAGNOSTICS_MAX_LENGTH = 200
+
+# days of daily usage requested when statistics are first imported for an account.
+STATISTICS_BACKFILL_DAYS = 7
+# minute past each hour that completed hours are imported.
+STATISTICS_IMPORT_MINUTE = 5
+
+# applications shown per page of the options flow.
+CATALOG_PAGE_SIZE = 50
+
+# number of refreshes without activity before the adaptive interval backs off.
+ADAPTIVE_IDLE_CYCLES = 5
+# a device seen within this window is considered active.
+ADAPTIVE_ACTIVITY_WINDOW = timedelta(minutes=10)
+ADAPTIVE_NIGHT_START = time(hour=23)
+ADAPTIVE_NIGHT_END = time(hour=6)
+
+EVENT_REQUEST_CREATED = f"{DOMAIN}_request_created"
+EVENT_REQUEST_RESOLVED = f"{DOMAIN}_request_resolved"
+
 DEFAULT_OVERRIDE_ENTITIES = [
     OverrideTarget.WINDOWS,
     OverrideTarget.XBOX
@@ -17,3 +114,44 @@ DEFAULT_OVERRIDE_ENTITIES = [
 AGG_ERROR = ("Aggregator error occured. "
              "This is an upstream issue with Microsoft and is usually temporary. "
              "Try reloading the integration in 15 minutes.")
+
+
+class Resource(StrEnum):
+    """A single class of data collected from the API."""
+
+    SCREENTIME = "screentime"
+    OVERRIDES = "overrides"
+    DEVICES = "devices"
+    BALANCE = "balance"
+    PENDING_REQUESTS = "pending_requests"
+
+
+class UpdateTier(StrEnum):
+    """Polling tiers, each tier is refreshed on its own interval."""
+
+    FAST = "fast"
+    SLOW = "slow"
+
+
+# Applications are parsed from the screentime report so are refreshed in the fast tier.
+TIER_RESOURCES: dict[UpdateTier, tuple[Resource, ...]] = {
+    UpdateTier.FAST: (Resource.SCREENTIME, Resource.OVERRIDES),
+    UpdateTier.SLOW: (Resource.DEVICES, Resource.BALANCE)
+}
+
+
+class IntervalReason(StrEnum):
+    """The reason for the current update interval."""
+
+    DEFAULT = "default"
+    DEVICE_ACTIVE = "device_active"
+    SCREENTIME_INCREASING = "screentime_increasing"
+    PENDING_REQUESTS = "pending_requests"
+    IDLE = "idle"
+    OVERNIGHT = "overnight"
+    RATE_LIMITED = "rate_limited"
+
+RESOURCE_TIER: dict[Resource, UpdateTier] = {
+    resource: tier for tier, resources in TIER_RESOURCES.items() for resource in resources
+}
+RESOURCE_TIER[Resource.PENDING_REQUESTS] = UpdateTier.FAST
@@ -1,30 +1,180 @@
 """Family Safety data hub."""
 
-import contextlib
+import asyncio
+import dataclasses
+import json
 import logging
-from datetime import timedelta
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import Any
 
-import async_timeout
-
-from homeassistant.core import HomeAssistant
-from pyfamilysafety import FamilySafety
-from pyfamilysafety.exceptions import AggregatorException
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from pyfamilysafety import FamilySafety, Account
+from pyfamilysafety.device import Device
+from pyfamilysafety.exceptions import AggregatorException, Unauthorized
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed
 )
 
-from .const import NAME
+from .const import (
+    AGG_ERROR,
+    DOMAIN,
+    NAME,
+    STORAGE_VERSION,
+    STORAGE_SAVE_DELAY,
+    CONF_SLOW_INTERVAL_DEFAULT,
+    CONF_MAX_INTERVAL_DEFAULT,
+    CONF_USAGE_LIMIT_DEFAULT,
+    CONF_USAGE_THRESHOLD_DEFAULT,
+    CONF_CONCURRENCY_DEFAULT,
+    CONF_REQUEST_TIMEOUT_DEFAULT,
+    CONF_REQUEST_INTERVAL_DEFAULT,
+    CONF_SLOW_CALL_THRESHOLD_DEFAULT,
+    EVENT_REQUEST_CREATED,
+    EVENT_REQUEST_RESOLVED,
+    ADAPTIVE_ACTIVITY_WINDOW,
+    ADAPTIVE_IDLE_CYCLES,
+    ADAPTIVE_NIGHT_END,
+    ADAPTIVE_NIGHT_START,
+    RESOURCE_TIER,
+    TIER_RESOURCES,
+    IntervalReason,
+    Resource,
+    UpdateTier
+)
+from .catalog import ApplicationCatalog
+from .history import UsageHistory
+from .metrics import Metrics, instrument_client
+from .response_cache import ResponseCache, cache_client
+from .scheduler import async_get_scheduler, schedule_client
+from .coalescer import CommandCoalescer
+from .resilience import CircuitBreaker, CircuitOpen, async_retry
+from .snapshot import AccountSnapshot, FamilySnapshot
+from .token_manager import TokenManager
 
 _LOGGER = logging.getLogger(__name__)
 
-class FamilySafetyCoordinator(DataUpdateCoordinator):
-    """Family safety data updater."""
+# The coordinator timer rounds down to the second, allow for this when checking due tiers.
+_SCHEDULE_TOLERANCE = timedelta(seconds=1)
+
+# (user_id, resource) or (user_id, resource, app_id) for application slices.
+type SliceKey = tuple[str, ...]
+type ChangedKeys = set[SliceKey]
+# (user_id, resource), user_id is None for family wide resources.
+type ResourceKey = tuple[str | None, Resource]
+
+
+def snapshot_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Return the store used to persist the last good snapshot of an entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+
+async def async_load_snapshot(hass: HomeAssistant, entry_id: str) -> FamilySnapshot | None:
+    """Load the last good snapshot of an entry."""
+    data = await snapshot_store(hass, entry_id).async_load()
+    if data is None:
+        return None
+    try:
+        return FamilySnapshot.from_dict(data)
+    except (KeyError, TypeError, ValueError) as err:
+        _LOGGER.warning("Ignoring invalid cached snapshot: %s", err)
+        return None
+
+
+def _request_identity(request: dict) -> int:
+    """Return a stable identity of a pending request.
+
+    The API issues new IDs every time pending requests are fetched, so the
+    identity is a hash of the request without its ID.
+    """
+    return hash(json.dumps({k: v for k, v in request.items() if k != "id"},
+                           sort_keys=True, default=str))
+
+
+def _account_fingerprints(account: Account, resources: set[Resource]) -> dict[SliceKey, int]:
+    """Return a fingerprint for each slice of an account rendered by entities."""
+    fingerprints: dict[SliceKey, int] = {}
+    if Resource.BALANCE in resources:
+        fingerprints[(account.user_id, Resource.BALANCE)] = hash(
+            (account.account_balance, account.account_currency))
+    if Resource.OVERRIDES in resources:
+        fingerprints[(account.user_id, Resource.OVERRIDES)] = hash(
+            tuple(account.blocked_platforms or []))
+    if Resource.SCREENTIME in resources or Resource.DEVICES in resources:
+        fingerprints[(account.user_id, Resource.SCREENTIME)] = hash((
+            account.today_screentime_usage,
+            tuple((d.device_name, d.today_time_used) for d in account.devices or []),
+            tuple((a.name, a.usage) for a in account.applications)
+        ))
+    if Resource.SCREENTIME in resources:
+        for app in account.applications:
+            fingerprints[(account.user_id, Resource.SCREENTIME, app.app_id)] = hash(
+                (app.name, app.usage, app.blocked, app.icon))
+    return fingerprints
+
+
+class FamilySafetyCoordinator(DataUpdateCoordinator[FamilySnapshot]):
+    """Family safety data updater.
+
+    Each account has its own schedule per update tier, on every tick only the
+    resources of tiers that are due are requested from the API. Refreshed data is
+    fingerprinted per account, resource and application and the keys whose
+    fingerprint changed are kept in changed_keys. Entities provide the keys they
+    render as their coordinator context and are only updated when one of them
+    changed.
+
+    The coordinator data is an immutable FamilySnapshot, only accounts that were
+    refreshed are rebuilt. Entities read from the snapshot, the pyfamilysafety
+    objects are only used to send commands.
+
+    Every API call is made concurrently within a configurable limit and with its
+    own timeout, transient errors are retried with jittered exponential backoff.
+    Resources that still fail keep their last good data and are marked stale,
+    they are retried on the next update while the rest of the refresh is kept.
+    After repeated aggregator errors a circuit breaker stops calling the API
+    until it has had time to recover.
+
+    Commands from entities are coalesced per account and sent through the same
+    concurrency limit, then only the changed resources of that account are
+    refreshed.
+
+    Pending requests are compared between refreshes to fire request created
+    and resolved events. They can be refreshed on their own faster interval,
+    separately from the rest of the family.
+
+    In adaptive mode the update interval is shortened while the family is
+    active and backs off exponentially while idle or overnight.
+
+    The roster of accounts is refreshed on the slow interval, added accounts
+    are collected straight away and removed accounts are dropped from the
+    snapshot. Platforms add and remove entities from the snapshot in place.
+
+    The last good snapshot is persisted after each refresh. When created from a
+    cached snapshot the coordinator is stale until set_api is called with a
+    logged in client.
+    """
 
     def __init__(self,
                  hass: HomeAssistant,
-                 family_safety: FamilySafety,
-                 update_interval: int=60) -> None:
+                 family_safety: FamilySafety | None,
+                 update_interval: int=60,
+                 slow_update_interval: int=CONF_SLOW_INTERVAL_DEFAULT,
+                 adaptive: bool=False,
+                 max_update_interval: int=CONF_MAX_INTERVAL_DEFAULT,
+                 usage_limit: int=CONF_USAGE_LIMIT_DEFAULT,
+                 usage_threshold: float=CONF_USAGE_THRESHOLD_DEFAULT,
+                 max_concurrency: int=CONF_CONCURRENCY_DEFAULT,
+                 request_timeout: int=CONF_REQUEST_TIMEOUT_DEFAULT,
+                 request_interval: int=CONF_REQUEST_INTERVAL_DEFAULT,
+                 slow_call_threshold: float=CONF_SLOW_CALL_THRESHOLD_DEFAULT,
+                 snapshot: FamilySnapshot | None = None) -> None:
         """Init the coordinator."""
         super().__init__(
             hass=hass,
@@ -32,13 +182,752 @@ class FamilySafetyCoordinator(DataUpdateCoordinator):
             name=NAME,
             update_interval=timedelta(seconds=update_interval)
         )
-        self.api: FamilySafety = family_safety
+        self.api: FamilySafety | None = None
+        self.stale = True
+        self._store = snapshot_store(hass, self.config_entry.entry_id)
+        self.token_manager = TokenManager(hass, self.config_entry)
+        self._slow_interval = timedelta(seconds=slow_update_interval)
+        self.tier_intervals: dict[UpdateTier, timedelta] = {
+            UpdateTier.FAST: timedelta(seconds=update_interval),
+            UpdateTier.SLOW: max(self._slow_interval, timedelta(seconds=update_interval))
+        }
+        self._next_refresh: dict[str, dict[UpdateTier, datetime]] = {}
+        self._next_roster_refresh: datetime | None = None
+        self._notify_all = True
+        self._fingerprints: dict[SliceKey, int] = {}
+        self.changed_keys: ChangedKeys = set()
+        self.usage_limit = usage_limit
+        self.usage_threshold = usage_threshold
+        self._max_concurrency = max(max_concurrency, 1)
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self.request_timeout = request_timeout
+        self.request_interval = timedelta(seconds=request_interval)
+        self._unsub_requests: CALLBACK_TYPE | None = None
+        self._refreshing_requests = False
+        self.config_entry.async_on_unload(self._async_stop_request_refresh)
+        # pending requests by identity, to find created and resolved requests.
+        self._requests: dict[int, dict] = {}
+        # every ID handed out for a still pending request, by identity.
+        self._request_ids: dict[str, int] = {}
+        self._request_lock = asyncio.Lock()
+        # periodic updates and single account refreshes write the same state.
+        self._refresh_lock = asyncio.Lock()
+        self.failed_resources: dict[ResourceKey, Exception] = {}
+        self.circuit_breaker = CircuitBreaker()
+        self.metrics = Metrics(slow_call_threshold)
+        self.responses = ResponseCache()
+        # the devices response each account's devices were last built from.
+        self._device_responses: dict[str, Any] = {}
+        self.scheduler = async_get_scheduler(hass)
+        self.scheduler.async_register(self.config_entry.entry_id)
+        self.config_entry.async_on_unload(
+            lambda: self.scheduler.async_unregister(self.config_entry.entry_id))
+        self._throttled = False
+        self.catalog = ApplicationCatalog(hass, self.config_entry.entry_id)
+        self.history = UsageHistory(hass, self.config_entry.entry_id)
+        self.commands = CommandCoalescer(
+            hass, self.config_entry, self.async_run_command, self._async_commands_sent)
+        # when each resource was last refreshed and the resources currently failing.
+        self.resource_updated: dict[ResourceKey, datetime] = {}
+        self.stale_resources: set[ResourceKey] = set()
+        self.adaptive = adaptive
+        self.base_interval = timedelta(seconds=update_interval)
+        self.max_interval = timedelta(seconds=max(max_update_interval, update_interval))
+        self.interval_reason = IntervalReason.DEFAULT
+        self._idle_cycles = 0
+        self._last_usage: dict[str, int] = {}
+        self._last_device_usage: dict[str, int] = {}
+        self.data = snapshot
+        # the first refresh is offset so entries don't poll together, later
+        # refreshes keep the offset as they are scheduled from the previous one.
+        self._staggered = True
+        self.update_interval = self.base_interval + self.scheduler.stagger(
+            self.config_entry.entry_id, self.base_interval)
+        if family_safety is not None:
+            self.set_api(family_safety)
 
-    async def _async_update_data(self):
-        """Fetch and update data from the API."""
+    def set_api(self, family_safety: FamilySafety):
+        """Use a logged in client, all data is collected when the client is created."""
+        self.api = family_safety
+        self.stale = False
+        instrument_client(family_safety, self.metrics)
+        cache_client(family_safety, self.responses)
+        schedule_client(family_safety, self.scheduler)
+        self.token_manager.async_start(family_safety.api)
+        self._notify_all = True
+        accounts = family_safety.accounts or []
+        self._last_usage = {a.user_id: a.today_screentime_usage for a in accounts}
+        self._last_device_usage = {
+            d.device_id: d.today_time_used for a in accounts for d in a.devices or []}
+        # requests pending before logging in are not reported as created.
+        self._requests = {_request_identity(r): r for r in family_safety.pending_requests or []}
+        self._request_ids = {r["id"]: identity for identity, r in self._requests.items()}
+        self._async_schedule_request_refresh()
+        now = dt_util.utcnow()
+        self._schedule_accounts(now)
+        self._next_roster_refresh = now + self.tier_intervals[UpdateTier.SLOW]
+        self.stale_resources = set()
+        self.resource_updated = {(a.user_id, r): now for a in accounts for r in Resource}
+        self.changed_keys = self._get_changed_keys({a.user_id: set(Resource) for a in accounts})
+        self.data = self._build_snapshot()
+        self.catalog.async_update_accounts(self.data.accounts.values())
+        for account in self.data.accounts.values():
+            self.history.async_record(account, now)
+        self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+    def _schedule_accounts(self, now: datetime):
+        """Schedule the next refresh of each tier for all accounts.
+
+        The slow tier is staggered across accounts so that slow requests for
+        a large family are spread out rather than all sent on the same tick.
+        """
+        accounts = self.api.accounts or []
+        for idx, account in enumerate(accounts):
+            self._next_refresh[account.user_id] = {
+                UpdateTier.FAST: now + self.tier_intervals[UpdateTier.FAST],
+                UpdateTier.SLOW: now + (self.tier_intervals[UpdateTier.SLOW] * (idx + 1) / len(accounts))
+            }
+
+    @callback
+    def async_apply_options(self,
+                            update_interval: int,
+                            slow_update_interval: int,
+                            adaptive: bool,
+                            max_update_interval: int,
+                            usage_limit: int,
+                            usage_threshold: float,
+                            max_concurrency: int,
+                            request_timeout: int,
+                            request_interval: int,
+                            slow_call_threshold: float) -> None:
+        """Apply changed options without reloading the config entry."""
+        self._slow_interval = timedelta(seconds=slow_update_interval)
+        self.base_interval = timedelta(seconds=update_interval)
+        self.max_interval = timedelta(seconds=max(max_update_interval, update_interval))
+        self.adaptive = adaptive
+        self._idle_cycles = 0
+        self._set_update_interval(self.base_interval, IntervalReason.DEFAULT)
+        self.tier_intervals[UpdateTier.SLOW] = max(self._slow_interval, self.update_interval)
+        if max(max_concurrency, 1) != self._max_concurrency:
+            self._max_concurrency = max(max_concurrency, 1)
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self.request_timeout = request_timeout
+        self.metrics.slow_call_threshold = slow_call_threshold
+        if timedelta(seconds=request_interval) != self.request_interval:
+            self.request_interval = timedelta(seconds=request_interval)
+            self._async_schedule_request_refresh()
+        if (usage_limit, usage_threshold) != (self.usage_limit, self.usage_threshold):
+            self.usage_limit = usage_limit
+            self.usage_threshold = usage_threshold
+            if self.api is not None:
+                self.data = self._build_snapshot()
+        # platforms add and remove entities for changed accounts and applications.
+        self._notify_all = True
+        self.async_update_listeners()
+
+    async def _async_refresh_roster(self, now: datetime) -> bool:
+        """Add and remove accounts when the family roster changed, returns if it changed."""
+        if self._next_roster_refresh is not None and self._next_roster_refresh > now + _SCHEDULE_TOLERANCE:
+            return False
+        self._next_roster_refresh = now + self.tier_intervals[UpdateTier.SLOW]
         try:
-            async with async_timeout.timeout(59):
-                with contextlib.suppress(AggregatorException):
-                    return await self.api.update()
+            response = await self.async_run_command(
+                lambda: self.api.api.send_request("get_accounts"))
+        except Unauthorized:
+            raise
         except Exception as err:
-            raise UpdateFailed(f"Error communicating with API {err}") from err
+            _LOGGER.debug("Failed to refresh the account roster: %s", err)
+            return False
+        members = {
+            m["id"]: m for m in (response.get("json") or {}).get("members", [])
+            if m.get("isDigitalSafetyEnabled")
+        }
+        current = {a.user_id for a in self.api.accounts or []}
+        added = [m for user_id, m in members.items() if user_id not in current]
+        removed = current - members.keys()
+        if not added and not removed:
+            return False
+        _LOGGER.info("Family roster changed, %s accounts added and %s removed",
+                     len(added), len(removed))
+        # collects all data of the new accounts.
+        new_accounts = await Account.from_dict(
+            self.api.api, {"members": added}, self.api.experimental) if added else []
+        self.api.accounts = [
+            a for a in self.api.accounts or [] if a.user_id not in removed] + new_accounts
+        for user_id in removed:
+            self._next_refresh.pop(user_id, None)
+            self._last_usage.pop(user_id, None)
+            self._device_responses.pop(user_id, None)
+        self._fingerprints = {k: v for k, v in self._fingerprints.items() if k[0] not in removed}
+        self.stale_resources = {k for k in self.stale_resources if k[0] not in removed}
+        self.resource_updated = {
+            k: v for k, v in self.resource_updated.items() if k[0] not in removed}
+        for account in new_accounts:
+            self._next_refresh[account.user_id] = {
+                tier: now + interval for tier, interval in self.tier_intervals.items()}
+            self._last_usage[account.user_id] = account.today_screentime_usage
+            self.resource_updated.update({(account.user_id, r): now for r in Resource})
+        self._get_changed_keys({a.user_id: set(Resource) for a in new_accounts}, False)
+        self._notify_all = True
+        return True
+
+    def _get_due_resources(self, now: datetime) -> dict[str, set[Resource]]:
+        """Return the resources due for each account and reschedule their tiers."""
+        due: dict[str, set[Resource]] = {}
+        for account in self.api.accounts or []:
+            schedule = self._next_refresh.setdefault(account.user_id, {})
+            resources = set()
+            for tier, interval in self.tier_intervals.items():
+                if schedule.get(tier, now) <= now + _SCHEDULE_TOLERANCE:
+                    resources.update(TIER_RESOURCES[tier])
+                    schedule[tier] = now + interval
+            if resources:
+                due[account.user_id] = resources
+        return due
+
+    def _get_activity_reason(self) -> IntervalReason | None:
+        """Return why the family is considered active, or None if idle.
+
+        Devices are only refreshed on the slow tier, so a device is active
+        when its screen time from the fast tier increased, or when it was
+        seen recently as of the last device refresh.
+        """
+        if self.api.experimental and self.api.pending_requests:
+            return IntervalReason.PENDING_REQUESTS
+        reason = None
+        now = dt_util.utcnow()
+        for account in self.api.accounts or []:
+            for device in account.devices or []:
+                used = device.today_time_used or 0
+                if used > (self._last_device_usage.get(device.device_id) or 0):
+                    reason = IntervalReason.DEVICE_ACTIVE
+                self._last_device_usage[device.device_id] = used
+            usage = account.today_screentime_usage or 0
+            if reason is None and usage > (self._last_usage.get(account.user_id) or 0):
+                reason = IntervalReason.SCREENTIME_INCREASING
+            self._last_usage[account.user_id] = usage
+            if reason is not None:
+                continue
+            for device in account.devices or []:
+                last_seen = dt_util.parse_datetime(device.last_seen or "")
+                if last_seen is None:
+                    continue
+                if last_seen.tzinfo is None:
+                    last_seen = last_seen.replace(tzinfo=dt_util.UTC)
+                if now - last_seen <= ADAPTIVE_ACTIVITY_WINDOW:
+                    reason = IntervalReason.DEVICE_ACTIVE
+                    break
+        return reason
+
+    def _update_adaptive_interval(self):
+        """Poll quickly while the family is active, back off while idle or overnight."""
+        reason = self._get_activity_reason()
+        if reason is not None:
+            self._idle_cycles = 0
+            self._set_update_interval(self.base_interval, reason)
+            return
+        self._idle_cycles += 1
+        local_time = dt_util.now().time()
+        overnight = (local_time >= ADAPTIVE_NIGHT_START) or (local_time < ADAPTIVE_NIGHT_END)
+        if overnight or self._idle_cycles >= ADAPTIVE_IDLE_CYCLES:
+            self._set_update_interval(
+                min(self.update_interval * 2, self.max_interval),
+                IntervalReason.OVERNIGHT if overnight else IntervalReason.IDLE
+            )
+            return
+        self._set_update_interval(self.base_interval, IntervalReason.DEFAULT)
+
+    def _set_update_interval(self, interval: timedelta, reason: IntervalReason):
+        """Change the update interval used for the fast tier."""
+        self.interval_reason = reason
+        if interval == self.update_interval:
+            return
+        _LOGGER.debug("Update interval changed to %s (%s)", interval, reason)
+        self.update_interval = interval
+        self.tier_intervals[UpdateTier.FAST] = interval
+        self.tier_intervals[UpdateTier.SLOW] = max(self._slow_interval, interval)
+        # fast tiers must be due on the next tick when shortening the interval.
+        next_tick = dt_util.utcnow() + interval
+        for schedule in self._next_refresh.values():
+            if schedule.get(UpdateTier.FAST, next_tick) > next_tick:
+                schedule[UpdateTier.FAST] = next_tick
+
+    async def _async_fetch_resource(self,
+                                    failed: dict[Resource, Exception],
+                                    resource: Resource,
+                                    func: Callable[[], Awaitable[Any]]) -> None:
+        """Run a single API call within the concurrency limit and request timeout.
+
+        Transient errors are retried, the concurrency slot is released while
+        waiting to retry.
+        """
+        async def _attempt():
+            await self._async_wait_for_budget()
+            async with self._semaphore:
+                async with asyncio.timeout(self.request_timeout):
+                    await func()
+
+        try:
+            await async_retry(_attempt)
+        except Unauthorized:
+            raise
+        except Exception as err:
+            _LOGGER.debug("Failed to refresh %s: %s", resource, err)
+            failed[resource] = err
+
+    async def async_run_command(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a single command within the request budget, concurrency limit and request timeout."""
+        await self._async_wait_for_budget()
+        async with self._semaphore:
+            async with asyncio.timeout(self.request_timeout):
+                return await func()
+
+    async def async_set_application_blocked(self, user_id: str, app_id: str, blocked: bool):
+        """Queue a command to block or unblock an application of an account."""
+        app = self.api.get_account(user_id).get_application(app_id)
+        await self.commands.async_send(
+            user_id,
+            (Resource.SCREENTIME, app_id),
+            app.block_app if blocked else app.unblock_app
+        )
+
+    async def _async_commands_sent(self, user_id: str, resources: set[Resource]) -> None:
+        """Refresh the resources of an account changed by commands."""
+        await self.async_refresh_account(user_id, resources)
+
+    async def async_refresh_account(self,
+                                    user_id: str,
+                                    resources: Iterable[Resource] | None = None) -> None:
+        """Refresh resources of a single account now, only notifying its entities.
+
+        Used after a command instead of refreshing the whole family, all
+        resources of the account are refreshed if none are given. The account
+        is rebuilt from the data already held if the refresh fails. Runs one at
+        a time with the periodic update, as both write the fingerprints and
+        snapshot.
+        """
+        async with self._refresh_lock:
+            await self._async_refresh_single_account(user_id, resources)
+
+    async def _async_refresh_single_account(self,
+                                            user_id: str,
+                                            resources: Iterable[Resource] | None) -> None:
+        """Refresh resources of a single account, see async_refresh_account."""
+        if self.api is None:
+            return
+        if not any(a.user_id == user_id for a in self.api.accounts or []):
+            # removed from the family since the command was sent.
+            _LOGGER.debug("Not refreshing %s, the account was removed", user_id)
+            return
+        resources = set(resources or RESOURCE_TIER) - {Resource.PENDING_REQUESTS}
+        now = dt_util.utcnow()
+        failed: dict[ResourceKey, Exception] = {}
+        if self.circuit_breaker.allow_request(now):
+            account_failed = await self._async_refresh_account(
+                self.api.get_account(user_id), resources)
+            failed = {(user_id, r): err for r, err in account_failed.items()}
+        else:
+            _LOGGER.debug("Circuit breaker open, not refreshing %s", user_id)
+            resources = set()
+        refreshed = {user_id: {r for r in resources if (user_id, r) not in failed}}
+        self.changed_keys = self._get_changed_keys(refreshed, requests_refreshed=False)
+        self.changed_keys |= self._update_staleness(
+            {user_id: resources}, failed, now, requests_requested=False)
+        self.data = self._build_snapshot({user_id})
+        if self.changed_keys:
+            self._async_update_aggregates(self.data)
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+            self.async_update_listeners()
+
+    async def _async_refresh_account(self,
+                                     account: Account,
+                                     resources: set[Resource]) -> dict[Resource, Exception]:
+        """Refresh the given resources of a single account, returning failed resources.
+
+        The library only exposes a full account update, so the individual
+        collectors are called directly. Devices are refreshed before overrides
+        as overrides set the blocked state of each device.
+
+        Unchanged responses are returned by the response cache as the same
+        object, applications and devices are then not rebuilt.
+        """
+        failed: dict[Resource, Exception] = {}
+
+        async def _refresh_screentime():
+            application_usage = account.application_usage
+            await account.get_screentime_usage()
+            if account.application_usage is not application_usage:
+                await account._get_applications()
+
+        async def _refresh_devices():
+            response = await self.api.api.send_request("get_user_devices", USER_ID=account.user_id)
+            devices = response.get("json")
+            if devices is self._device_responses.get(account.user_id) and account.devices:
+                return
+            account.devices = Device.from_dict(devices, account.screentime_usage)
+            self._device_responses[account.user_id] = devices
+
+        async def _refresh_devices_and_overrides():
+            if Resource.DEVICES in resources:
+                await self._async_fetch_resource(failed, Resource.DEVICES, _refresh_devices)
+            if Resource.OVERRIDES in resources:
+                await self._async_fetch_resource(failed, Resource.OVERRIDES, account._get_overrides)
+
+        coros = [_refresh_devices_and_overrides()]
+        if Resource.SCREENTIME in resources:
+            coros.append(self._async_fetch_resource(failed, Resource.SCREENTIME, _refresh_screentime))
+        if Resource.BALANCE in resources:
+            coros.append(self._async_fetch_resource(
+                failed, Resource.BALANCE, account._get_account_balance))
+        await asyncio.gather(*coros)
+        if account.screentime_usage is not None:
+            for device in account.devices or []:
+                device.read_screentime_report(account.screentime_usage)
+        return failed
+
+    async def _async_fetch(self, due: dict[str, set[Resource]]) -> dict[ResourceKey, Exception]:
+        """Fetch all due resources concurrently, returning failed (user_id, resource) keys."""
+        pending_failed: dict[Resource, Exception] = {}
+        coros = [
+            self._async_refresh_account(self.api.get_account(user_id), resources)
+            for user_id, resources in due.items()
+        ]
+        if self.api.experimental and self._unsub_requests is None:
+            coros.append(self._async_fetch_resource(
+                pending_failed, Resource.PENDING_REQUESTS, self.api._get_pending_requests))
+        results = await asyncio.gather(*coros)
+        failed: dict[ResourceKey, Exception] = {}
+        for user_id, account_failed in zip(due, results):
+            failed.update({(user_id, r): err for r, err in account_failed.items()})
+        failed.update({(None, r): err for r, err in pending_failed.items()})
+        return failed
+
+    def _get_changed_keys(self,
+                          refreshed: dict[str, set[Resource]],
+                          requests_refreshed: bool = True) -> ChangedKeys:
+        """Fingerprint the refreshed slices and return the keys that changed."""
+        fingerprints: dict[SliceKey, int] = {}
+        for user_id, resources in refreshed.items():
+            fingerprints.update(_account_fingerprints(self.api.get_account(user_id), resources))
+        if self.api.experimental and requests_refreshed:
+            for account in self.api.accounts:
+                fingerprints[(account.user_id, Resource.PENDING_REQUESTS)] = hash(json.dumps(
+                    self.api.get_account_requests(account.user_id), sort_keys=True, default=str))
+        changed = {k for k, v in fingerprints.items() if self._fingerprints.get(k) != v}
+        self._fingerprints.update(fingerprints)
+        return changed
+
+    def _update_staleness(self,
+                          due: dict[str, set[Resource]],
+                          failed: dict[ResourceKey, Exception],
+                          now: datetime,
+                          requests_requested: bool = True) -> ChangedKeys:
+        """Track when each due resource was refreshed, returning slices whose staleness changed."""
+        requested: set[ResourceKey] = {(u, r) for u, resources in due.items() for r in resources}
+        if self.api.experimental and requests_requested:
+            requested.add((None, Resource.PENDING_REQUESTS))
+        toggled: set[ResourceKey] = set()
+        for key in requested:
+            if key in failed:
+                if key not in self.stale_resources:
+                    self.stale_resources.add(key)
+                    toggled.add(key)
+                continue
+            self.resource_updated[key] = now
+            if key in self.stale_resources:
+                self.stale_resources.discard(key)
+                toggled.add(key)
+        changed: ChangedKeys = set()
+        for user_id, resource in toggled:
+            if user_id is None:
+                changed.update((a.user_id, resource) for a in self.api.accounts or [])
+            else:
+                changed.add((user_id, resource))
+        if any(resource == Resource.SCREENTIME for _, resource in toggled):
+            # application slices render the screentime resource.
+            changed.update(k for k in self._fingerprints if len(k) == 3 and k[:2] in changed)
+        return changed
+
+    def get_last_updated(self, keys: Iterable[SliceKey]) -> datetime | None:
+        """Return when the oldest stale resource of the given slices was last refreshed.
+
+        Returns None if none of the resources are stale.
+        """
+        oldest = None
+        stale = False
+        for key in keys:
+            for resource_key in ((key[0], key[1]), (None, key[1])):
+                if resource_key not in self.stale_resources:
+                    continue
+                stale = True
+                updated = self.resource_updated.get(resource_key)
+                if updated is not None and (oldest is None or updated < oldest):
+                    oldest = updated
+        if not stale:
+            return None
+        return oldest or dt_util.utc_from_timestamp(0)
+
+    def _build_snapshot(self, user_ids: Iterable[str] | None = None) -> FamilySnapshot:
+        """Build a new snapshot, only rebuilding the given accounts."""
+        previous = self.data or FamilySnapshot()
+        requests: dict[str, dict] = {}
+        requests_by_account: dict[str, list[dict]] = {}
+        for request in self.api.pending_requests or []:
+            requests[request["id"]] = request
+            requests_by_account.setdefault(request["puid"], []).append(request)
+        accounts: dict[str, AccountSnapshot] = {}
+        for account in self.api.accounts or []:
+            account_requests = tuple(requests_by_account.get(account.user_id, ()))
+            existing = previous.accounts.get(account.user_id)
+            if existing is None or user_ids is None or account.user_id in user_ids:
+                accounts[account.user_id] = AccountSnapshot.from_account(
+                    account, account_requests, self.usage_limit, self.usage_threshold)
+            elif existing.pending_requests != account_requests:
+                accounts[account.user_id] = dataclasses.replace(
+                    existing, pending_requests=account_requests)
+            else:
+                accounts[account.user_id] = existing
+        return FamilySnapshot(
+            accounts=MappingProxyType(accounts),
+            requests=MappingProxyType(requests)
+        )
+
+    @callback
+    def async_pending_requests_changed(self) -> None:
+        """Rebuild the snapshot and notify entities after pending requests were answered."""
+        if self.api is None:
+            return
+        self.changed_keys = self._get_changed_keys({})
+        self.data = self._build_snapshot(set())
+        self._async_fire_request_events()
+        self.async_update_listeners()
+
+    @callback
+    def _async_fire_request_events(self) -> None:
+        """Fire events for requests created or resolved since the last refresh."""
+        current = {_request_identity(r): r for r in self.api.pending_requests or []}
+        for identity, request in current.items():
+            if identity not in self._requests:
+                self.hass.bus.async_fire(EVENT_REQUEST_CREATED, self._request_event_data(request))
+        for identity, request in self._requests.items():
+            if identity not in current:
+                self.hass.bus.async_fire(EVENT_REQUEST_RESOLVED, self._request_event_data(request))
+        self._requests = current
+        # earlier IDs of a request remain valid while it is pending.
+        self._request_ids = {
+            request_id: identity for request_id, identity in self._request_ids.items()
+            if identity in current
+        }
+        self._request_ids.update({r["id"]: identity for identity, r in current.items()})
+
+    def is_pending_request(self, request_id: str) -> bool:
+        """Return if an ID, current or issued earlier, belongs to a pending request."""
+        return request_id in self._request_ids or request_id in self.data.requests
+
+    def _current_request_id(self, request_id: str) -> str:
+        """Return the current ID of a pending request given any of its IDs."""
+        identity = self._request_ids.get(request_id)
+        if identity is None:
+            return request_id
+        for request in self.api.pending_requests or []:
+            if _request_identity(request) == identity:
+                return request["id"]
+        raise ValueError("Pending request not found")
+
+    async def async_answer_request(self,
+                                   request_id: str,
+                                   approve: bool,
+                                   extension_time: int = 0) -> bool:
+        """Approve or deny a pending request, returns if the API accepted the answer.
+
+        The library refetches pending requests after each answer, which
+        issues new IDs. Answers are sent one at a time and the request is
+        looked up by its identity right before sending, so IDs from events
+        or an earlier snapshot can still be answered.
+        """
+        if self.api is None:
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="not_connected"
+            )
+        async with self._request_lock:
+            current_id = self._current_request_id(request_id)
+            if approve:
+                return await self.async_run_command(
+                    lambda: self.api.approve_pending_request(
+                        request_id=current_id, extension_time=extension_time))
+            return await self.async_run_command(
+                lambda: self.api.deny_pending_request(request_id=current_id))
+
+    def _request_event_data(self, request: dict) -> dict[str, Any]:
+        """Return the data of a request event."""
+        account = self.data.accounts.get(request.get("puid")) if self.data else None
+        return {
+            "config_entry_id": self.config_entry.entry_id,
+            "request_id": request.get("id"),
+            "account_id": request.get("puid"),
+            "account_name": None if account is None else account.first_name,
+            "request": request
+        }
+
+    @callback
+    def _async_schedule_request_refresh(self) -> None:
+        """Refresh pending requests on their own interval when enabled."""
+        self._async_stop_request_refresh()
+        if self.api is None or not self.api.experimental or not self.request_interval:
+            return
+        self._unsub_requests = async_track_time_interval(
+            self.hass, self._async_refresh_requests, self.request_interval,
+            name=f"{DOMAIN} pending requests")
+
+    @callback
+    def _async_stop_request_refresh(self) -> None:
+        """Stop refreshing pending requests on their own interval."""
+        if self._unsub_requests is not None:
+            self._unsub_requests()
+            self._unsub_requests = None
+
+    async def _async_refresh_requests(self, _now: datetime) -> None:
+        """Refresh only the pending requests, only notifying entities showing them."""
+        now = dt_util.utcnow()
+        if (self.api is None or self._refreshing_requests
+                or not self.circuit_breaker.allow_request(now)):
+            return
+        self._refreshing_requests = True
+        failed: dict[Resource, Exception] = {}
+        try:
+            await self._async_fetch_resource(
+                failed, Resource.PENDING_REQUESTS, self.api._get_pending_requests)
+        except Unauthorized as err:
+            # the token is refreshed by the next update of the family.
+            _LOGGER.debug("Access token rejected refreshing pending requests: %s", err)
+            return
+        finally:
+            self._refreshing_requests = False
+        self.changed_keys = self._get_changed_keys({}, not failed)
+        self.changed_keys |= self._update_staleness(
+            {}, {(None, r): err for r, err in failed.items()}, now)
+        if not failed:
+            self._async_fire_request_events()
+        if self.changed_keys:
+            self.data = self._build_snapshot(set())
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+            self.async_update_listeners()
+
+    @callback
+    def _async_update_aggregates(self, snapshot: FamilySnapshot) -> None:
+        """Merge accounts whose screentime changed into the catalog and usage history."""
+        user_ids = {k[0] for k in self.changed_keys if k[1] == Resource.SCREENTIME}
+        accounts = [snapshot.accounts[u] for u in user_ids if u in snapshot.accounts]
+        self.catalog.async_update_accounts(accounts)
+        for account in accounts:
+            self.history.async_record(account)
+
+    def _data_to_store(self) -> dict:
+        """Return the snapshot to persist."""
+        return self.data.as_dict()
+
+    async def _async_wait_for_budget(self) -> None:
+        """Wait until the shared request budget allows another request."""
+        if await self.scheduler.async_wait():
+            self._throttled = True
+
+    def _update_rate_limited_interval(self):
+        """Poll more slowly while the shared request budget is exhausted."""
+        if self._throttled:
+            _LOGGER.debug("Request budget exhausted, slowing down updates")
+            self._set_update_interval(
+                min(self.update_interval * 2, self.max_interval), IntervalReason.RATE_LIMITED)
+        elif not self.adaptive and self.interval_reason == IntervalReason.RATE_LIMITED:
+            self._set_update_interval(self.base_interval, IntervalReason.DEFAULT)
+        self._throttled = False
+
+    async def _async_update_data(self) -> FamilySnapshot:
+        """Fetch and update data from the API."""
+        async with self._refresh_lock:
+            return await self._async_update()
+
+    async def _async_update(self) -> FamilySnapshot:
+        """Fetch and update data from the API, see _async_update_data."""
+        if self._staggered:
+            self._staggered = False
+            self.update_interval = self.tier_intervals[UpdateTier.FAST]
+        if self.api is None:
+            # still serving the cached snapshot while logging in.
+            self.changed_keys = set()
+            return self.data
+        # entity availability changes when recovering from a failed update.
+        self._notify_all = not self.last_update_success
+        now = dt_util.utcnow()
+        started = time.perf_counter()
+        self.changed_keys = set()
+        if not self.circuit_breaker.allow_request(now):
+            # serve the last good data, due resources are marked stale.
+            _LOGGER.debug("Circuit breaker open, skipping update")
+            due = self._get_due_resources(now)
+            err = CircuitOpen(f"API calls paused until {self.circuit_breaker.retry_at}")
+            self.failed_resources = {(u, r): err for u, resources in due.items() for r in resources}
+            requests_due = self.api.experimental and self._unsub_requests is None
+            if requests_due:
+                self.failed_resources[(None, Resource.PENDING_REQUESTS)] = err
+            self.changed_keys = self._update_staleness(
+                due, self.failed_resources, now, requests_due)
+            return self.data
+        try:
+            with self.metrics.measure("fetch"):
+                roster_changed = await self._async_refresh_roster(now)
+                due = self._get_due_resources(now)
+                self.failed_resources = await self._async_fetch(due)
+        except Unauthorized as err:
+            self._notify_all = True
+            # refresh outside of the polling path, the next update uses the new token.
+            self.config_entry.async_create_background_task(
+                self.hass, self.token_manager.async_refresh(), f"{DOMAIN}_token_refresh")
+            raise UpdateFailed(f"Access token rejected {err}") from err
+        if any(isinstance(e, AggregatorException) for e in self.failed_resources.values()):
+            was_open = self.circuit_breaker.opened_at is not None
+            self.circuit_breaker.record_failure(now)
+            if not was_open and self.circuit_breaker.opened_at is not None:
+                _LOGGER.warning(AGG_ERROR)
+        else:
+            self.circuit_breaker.record_success()
+        merge_started = time.perf_counter()
+        refreshed: dict[str, set[Resource]] = {}
+        for user_id, resources in due.items():
+            refreshed[user_id] = {r for r in resources if (user_id, r) not in self.failed_resources}
+        for user_id, resource in self.failed_resources:
+            if user_id is not None:
+                # retry the tier of a failed resource on the next update.
+                self._next_refresh[user_id][RESOURCE_TIER[resource]] = now
+        if self.failed_resources:
+            _LOGGER.warning("Partial update, failed to refresh %s",
+                            ", ".join(f"{r} ({u or 'family'})" for u, r in self.failed_resources))
+        # pending requests have their own interval when refreshed separately.
+        requests_due = self._unsub_requests is None
+        requests_refreshed = (
+            requests_due and (None, Resource.PENDING_REQUESTS) not in self.failed_resources)
+        self.changed_keys = self._get_changed_keys(refreshed, requests_refreshed)
+        self.changed_keys |= self._update_staleness(due, self.failed_resources, now, requests_due)
+        if self.adaptive:
+            self._update_adaptive_interval()
+        self._update_rate_limited_interval()
+        snapshot = self._build_snapshot({u for u, resources in refreshed.items() if resources})
+        if requests_refreshed and self.api.experimental:
+            self._async_fire_request_events()
+        if self.changed_keys or roster_changed:
+            self._async_update_aggregates(snapshot)
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+        self.metrics.add("merge", time.perf_counter() - merge_started)
+        self.metrics.add("refresh", time.perf_counter() - started)
+        return snapshot
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update listeners whose context contains a changed slice."""
+        with self.metrics.measure("dispatch"):
+            if self._notify_all or not self.last_update_success:
+                super().async_update_listeners()
+                return
+            for update_callback, context in list(self._listeners.values()):
+                if context is None or not context.isdisjoint(self.changed_keys):
+                    update_callback()
@@ -1,60 +1,164 @@
-"""Diagnostics support for Reolink."""
+"""Diagnostics support for Microsoft Family Safety."""
 
 from __future__ import annotations
 
+from collections.abc import Iterable
 from typing import Any
 
+from pyfamilysafety import Account
+
+from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
 
+from .client import session_stats
 from .config_entry import FamilySafetyConfigEntry
+from .const import DOMAIN, DIAGNOSTICS_MAX_ITEMS, DIAGNOSTICS_MAX_LENGTH
+from .snapshot import AccountSnapshot
+
+# names and raw identifiers of pending requests.
+TO_REDACT = {"firstName", "lastName", "displayName", "deviceName", "profilePicUrl", "puid", "deviceId"}
+
+
+class _Aliases:
+    """Replaces account and device IDs with stable placeholders within a download."""
+
+    def __init__(self) -> None:
+        """Create empty aliases."""
+        self._aliases: dict[str, str] = {}
+
+    def __call__(self, kind: str, identifier: str | None) -> str | None:
+        """Return the placeholder of an identifier."""
+        if identifier is None:
+            return None
+        key = f"{kind}/{identifier}"
+        if key not in self._aliases:
+            count = sum(1 for k in self._aliases if k.startswith(f"{kind}/"))
+            self._aliases[key] = f"{kind}_{count + 1}"
+        return self._aliases[key]
+
+
+def _summarize(value: Any) -> Any:
+    """Truncate long strings and lists, keeping the first items of a list."""
+    if isinstance(value, str):
+        if len(value) <= DIAGNOSTICS_MAX_LENGTH:
+            return value
+        return f"{value[:DIAGNOSTICS_MAX_LENGTH]}... ({len(value)} characters)"
+    if isinstance(value, dict):
+        return {k: _summarize(v) for k, v in value.items()}
+    if isinstance(value, list | tuple):
+        items = [_summarize(v) for v in value[:DIAGNOSTICS_MAX_ITEMS]]
+        if len(value) > DIAGNOSTICS_MAX_ITEMS:
+            items.append(f"... {len(value) - DIAGNOSTICS_MAX_ITEMS} more")
+        return items
+    return value
+
+
+def _account_diagnostics(account: AccountSnapshot,
+                         raw: Account | None,
+                         aliases: _Aliases) -> dict[str, Any]:
+    """Return a single account, applications are only listed when used, blocked or restricted.
+
+    Names and icons of applications are shared between accounts so are
+    listed once in the applications section of the download.
+    """
+    raw_devices = {d.device_id: d for d in raw.devices or []} if raw is not None else {}
+    devices = []
+    for device in account.devices:
+        device_data = {
+            "id": aliases("device", device.device_id),
+            "today_screentime_used": device.today_time_used,
+            "last_seen": device.last_seen,
+            "blocked": device.blocked
+        }
+        if (raw_device := raw_devices.get(device.device_id)) is not None:
+            device_data.update({
+                "class": raw_device.device_class,
+                "make": raw_device.device_make,
+                "model": raw_device.device_model,
+                "form_factor": raw_device.form_factor,
+                "os_name": raw_device.os_name,
+                "issues": _summarize(raw_device.issues),
+                "states": _summarize(raw_device.states)
+            })
+        devices.append(device_data)
+    return {
+        "id": aliases("account", account.user_id),
+        "role": raw.role if raw is not None else None,
+        "experimental": raw.experimental if raw is not None else None,
+        "today_screentime_usage": account.today_screentime_usage,
+        "average_screentime_usage": account.average_screentime_usage,
+        "blocked_platforms": [p.name for p in account.blocked_platforms],
+        "acc_balance": account.account_balance,
+        "acc_currency": account.account_currency,
+        "devices": devices,
+        "applications_total": len(account.applications),
+        "applications": {
+            app.app_id: {
+                "usage": app.usage,
+                "blocked": app.blocked,
+                "policy": _summarize(app.policy)
+            }
+            for app in account.applications.values()
+            if app.usage or app.blocked or app.policy
+        }
+    }
+
+
+def _diagnostics(config_entry: FamilySafetyConfigEntry,
+                 accounts: Iterable[AccountSnapshot]) -> dict[str, Any]:
+    """Return the diagnostics of the given accounts."""
+    data = config_entry.runtime_data
+    raw_accounts = {a.user_id: a for a in data.api.accounts or []} if data.api is not None else {}
+    aliases = _Aliases()
+    account_data = []
+    applications: dict[str, dict[str, Any]] = {}
+    user_ids = set()
+    for account in accounts:
+        user_ids.add(account.user_id)
+        account_data.append(
+            _account_diagnostics(account, raw_accounts.get(account.user_id), aliases))
+        for app in account.applications.values():
+            shared = applications.setdefault(app.app_id, {
+                "name": _summarize(app.name),
+                "has_icon": app.icon is not None,
+                "accounts": 0
+            })
+            shared["accounts"] += 1
+    requests = [
+        {**async_redact_data(request, TO_REDACT), "account": aliases("account", request.get("puid"))}
+        for request in data.data.requests.values() if request.get("puid") in user_ids
+    ]
+    return {
+        # still logging in, only the cached snapshot is available.
+        "stale": data.api is None,
+        "accounts_total": len(data.data.accounts),
+        "pending_requests": _summarize(requests),
+        "http_pool": session_stats(data.api),
+        "metrics": data.metrics.as_dict(),
+        "request_budget": data.scheduler.as_dict(),
+        "response_cache": data.responses.as_dict(),
+        "applications": applications,
+        "accounts": account_data
+    }
 
 
 async def async_get_config_entry_diagnostics(
     hass: HomeAssistant, config_entry: FamilySafetyConfigEntry
 ) -> dict[str, Any]:
     """Return diagnostics for a config entry."""
-    data = config_entry.runtime_data
-    diagnostic_data = {
-        "accounts": [],
-        "pending_requests": data.api.pending_requests
-    }
-    accounts = data.api.accounts
-    for acc in accounts:
-        acc_data = {
-            "id": acc.user_id,
-            "role": acc.role,
-            "devices": [],
-            "applications": [],
-            "today_screentime_usage": acc.today_screentime_usage,
-            "average_screentime_usage": acc.average_screentime_usage,
-            "screentime_usage": acc.screentime_usage,
-            "blocked_platforms": [str(x) for x in acc.blocked_platforms],
-            "experimental": acc.experimental,
-            "acc_balance": acc.account_balance,
-            "acc_currency": acc.account_currency
-        }
-        for dev in acc.devices:
-            acc_data["devices"].append({
-                "id": dev.device_id,
-                "class": dev.device_class,
-                "make": dev.device_make,
-                "model": dev.device_model,
-                "form_factor": dev.form_factor,
-                "os_name": dev.os_name,
-                "today_screentime_used": dev.today_time_used,
-                "issues": dev.issues,
-                "states": dev.states,
-                "last_seen": dev.last_seen,
-                "blocked": dev.blocked
-            })
-        for app in acc.applications:
-            acc_data["applications"].append({
-                "id": app.app_id,
-                "name": app.name,
-                "icon": app.icon,
-                "policy": app.policy,
-                "blocked": app.blocked
-            })
-        diagnostic_data["accounts"].append(acc_data)
+    return _diagnostics(config_entry, config_entry.runtime_data.data.accounts.values())
+
 
-    return diagnostic_data
+async def async_get_device_diagnostics(
+    hass: HomeAssistant, config_entry: FamilySafetyConfigEntry, device: dr.DeviceEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a single account, or all accounts for the service device."""
+    accounts = config_entry.runtime_data.data.accounts
+    for domain, identifier in device.identifiers:
+        if domain != DOMAIN:
+            continue
+        user_id = identifier.removeprefix("familysafety_")
+        if user_id in accounts:
+            return _diagnostics(config_entry, [accounts[user_id]])
+    return _diagnostics(config_entry, accounts.values())
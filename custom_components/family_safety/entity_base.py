@@ -2,23 +2,220 @@
 
 import logging
 
+from collections.abc import Awaitable, Callable, Iterable, Mapping
 from datetime import datetime, time, timedelta
+from typing import Any
 
-from pyfamilysafety import Account
+from pyfamilysafety import Account, FamilySafety
 from pyfamilysafety.application import Application
 from pyfamilysafety.enum import OverrideTarget, OverrideType
 
+from homeassistant.core import HomeAssistant, callback
 import homeassistant.helpers.device_registry as dr
+import homeassistant.helpers.entity_registry as er
 from homeassistant.helpers.entity import DeviceInfo, Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.exceptions import ServiceValidationError
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
 
-from .const import DOMAIN
+from .const import DOMAIN, NAME, Resource
+from .config_entry import FamilySafetyConfigEntry
 from .coordinator import FamilySafetyCoordinator
+from .snapshot import AccountSnapshot, ApplicationSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def application_in_use(app: ApplicationSnapshot | None) -> bool:
+    """Return if an account has used an application or has a policy for it."""
+    return app is not None and bool(app.usage or app.blocked or app.policy)
+
+
+def included_accounts(config_entry: FamilySafetyConfigEntry) -> list[AccountSnapshot]:
+    """Return the accounts selected in the options, all accounts if none are selected."""
+    selected = config_entry.options.get("accounts") or []
+    return [
+        a for a in config_entry.runtime_data.data.accounts.values()
+        if not selected or a.user_id in selected
+    ]
+
+
+@callback
+def async_add_account_entities(
+    config_entry: FamilySafetyConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    entity_fn: Callable[[AccountSnapshot], list[Entity]]
+) -> None:
+    """Add entities for each included account, including accounts discovered later.
+
+    Entities of removed accounts are removed with their device, see
+    async_track_removed_accounts.
+    """
+    coordinator: FamilySafetyCoordinator = config_entry.runtime_data
+    added: set[str] = set()
+
+    @callback
+    def _async_add_new_accounts() -> None:
+        """Add entities for accounts that were added."""
+        accounts = included_accounts(config_entry)
+        # an account removed and added again gets new entities.
+        added.intersection_update(a.user_id for a in accounts)
+        entities = []
+        for account in accounts:
+            if account.user_id not in added:
+                added.add(account.user_id)
+                entities.extend(entity_fn(account))
+        if entities:
+            async_add_entities(entities)
+
+    _async_add_new_accounts()
+    config_entry.async_on_unload(coordinator.async_add_listener(_async_add_new_accounts))
+
+
+@callback
+def async_add_application_entities(
+    hass: HomeAssistant,
+    config_entry: FamilySafetyConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    domain: str,
+    unique_id_fn: Callable[[str, str], str],
+    entity_fn: Callable[[str, str], Entity]
+) -> None:
+    """Add entities for tracked applications once an account starts using them.
+
+    Rather than one entity per account for every tracked application, an
+    entity is only created the first time the snapshot of an account shows
+    usage or a policy for the application. Entities already in the entity
+    registry are created straight away so they are stable across restarts.
+    Entities of applications no longer tracked are removed.
+    """
+    coordinator: FamilySafetyCoordinator = config_entry.runtime_data
+    entity_registry = er.async_get(hass)
+    registered = {
+        e.unique_id for e in er.async_entries_for_config_entry(
+            entity_registry, config_entry.entry_id)
+        if e.domain == domain
+    }
+    added: dict[tuple[str, str], Entity] = {}
+
+    @callback
+    def _async_update_entities() -> None:
+        """Add entities for applications now in use, remove untracked applications."""
+        tracked = config_entry.options.get("tracked_applications", [])
+        accounts = included_accounts(config_entry)
+        account_ids = {a.user_id for a in accounts}
+        for key in list(added):
+            if key[0] not in account_ids:
+                # removed with the device of the account.
+                added.pop(key)
+            elif key[1] not in tracked:
+                entity = added.pop(key)
+                registered.discard(unique_id_fn(*key))
+                if entity.registry_entry is not None:
+                    entity_registry.async_remove(entity.entity_id)
+        entities = []
+        for account in accounts:
+            for app_id in tracked:
+                key = (account.user_id, app_id)
+                if key in added:
+                    continue
+                if (unique_id_fn(*key) not in registered
+                        and not application_in_use(account.applications.get(app_id))):
+                    continue
+                added[key] = entity_fn(*key)
+                entities.append(added[key])
+        if entities:
+            async_add_entities(entities)
+
+    _async_update_entities()
+    config_entry.async_on_unload(coordinator.async_add_listener(_async_update_entities))
+
+
+@callback
+def async_disable_application_entities(
+    hass: HomeAssistant,
+    config_entry: FamilySafetyConfigEntry,
+    domain: str,
+    unique_id_fn: Callable[[str, str], str],
+    disabled: bool
+) -> None:
+    """Disable the registered entities of tracked applications of a platform.
+
+    Entries are kept so names, areas and history survive, when enabled again
+    only the entries disabled by the integration are enabled, not those the
+    user disabled.
+    """
+    entity_registry = er.async_get(hass)
+    unique_ids = {
+        unique_id_fn(account.user_id, app_id)
+        for account in included_accounts(config_entry)
+        for app_id in config_entry.options.get("tracked_applications", [])
+    }
+    for entry in er.async_entries_for_config_entry(entity_registry, config_entry.entry_id):
+        if entry.domain != domain or entry.unique_id not in unique_ids:
+            continue
+        if disabled and entry.disabled_by is None:
+            entity_registry.async_update_entity(
+                entry.entity_id, disabled_by=er.RegistryEntryDisabler.INTEGRATION)
+        elif not disabled and entry.disabled_by is er.RegistryEntryDisabler.INTEGRATION:
+            entity_registry.async_update_entity(entry.entity_id, disabled_by=None)
+
+
+@callback
+def async_track_removed_accounts(hass: HomeAssistant, config_entry: FamilySafetyConfigEntry) -> None:
+    """Remove the devices, and so the entities, of accounts no longer included."""
+    device_registry = dr.async_get(hass)
+    included: set[str] = set()
+
+    @callback
+    def _async_remove_stale_devices() -> None:
+        """Remove devices when the included accounts changed."""
+        accounts = {a.user_id for a in included_accounts(config_entry)}
+        if accounts == included:
+            return
+        included.clear()
+        included.update(accounts)
+        keep = {f"familysafety_{config_entry.entry_id}"}
+        keep.update(f"familysafety_{user_id}" for user_id in accounts)
+        for device in dr.async_entries_for_config_entry(device_registry, config_entry.entry_id):
+            if any(domain == DOMAIN and identifier not in keep
+                   for domain, identifier in device.identifiers):
+                _LOGGER.debug("Removing device %s of a removed account", device.name)
+                device_registry.async_update_device(
+                    device.id, remove_config_entry_id=config_entry.entry_id)
+
+    _async_remove_stale_devices()
+    config_entry.async_on_unload(
+        config_entry.runtime_data.async_add_listener(_async_remove_stale_devices))
+
+
+class FamilySafetyEntity(CoordinatorEntity, Entity):
+    """Base class for entities describing the integration itself."""
+
+    def __init__(self,
+                 coordinator: FamilySafetyCoordinator,
+                 entity_id) -> None:
+        """Create a FamilySafetyEntity."""
+        super().__init__(coordinator)
+        self._entity_id = entity_id
+        self.coordinator: FamilySafetyCoordinator = coordinator
+
+    @property
+    def unique_id(self) -> str:
+        """Return a unique ID for the entity."""
+        return f"{self.coordinator.config_entry.entry_id}_{self._entity_id}"
+
+    @property
+    def device_info(self):
+        """Return device info."""
+        return DeviceInfo(
+            identifiers={(DOMAIN, f"familysafety_{self.coordinator.config_entry.entry_id}")},
+            manufacturer="Microsoft",
+            name=NAME,
+            entry_type=dr.DeviceEntryType.SERVICE
+        )
+
+
 class ManagedAccountEntity(CoordinatorEntity, Entity):
     """Base class for all managed account entities."""
 
@@ -26,17 +223,58 @@ class ManagedAccountEntity(CoordinatorEntity, Entity):
                  coordinator: FamilySafetyCoordinator,
                  idx,
                  account_id,
-                 entity_id) -> None:
+                 entity_id,
+                 resources: Iterable[Resource] | None = None) -> None:
         """Create a ManagedAccountEntity."""
+        if idx is None and resources is not None:
+            # only listen for updates to the resources this entity renders.
+            idx = frozenset((account_id, r) for r in resources)
         super().__init__(coordinator, idx)
         self._account_id = account_id
         self._entity_id = entity_id
         self.coordinator: FamilySafetyCoordinator = coordinator
+        self._optimistic_state: bool | None = None
 
     @property
-    def _account(self) -> Account:
+    def _account(self) -> AccountSnapshot:
         """Return the managed account."""
-        return self.coordinator.api.get_account(self._account_id)
+        return self.coordinator.data.get_account(self._account_id)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if self._account_id not in self.coordinator.data.accounts:
+            # the account was removed, the entity is removed with its device.
+            return
+        super()._handle_coordinator_update()
+
+    @property
+    def _api(self) -> FamilySafety:
+        """Return the pyfamilysafety client used to send commands."""
+        if self.coordinator.api is None:
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="not_connected"
+            )
+        return self.coordinator.api
+
+    @property
+    def _api_account(self) -> Account:
+        """Return the pyfamilysafety account used to send commands."""
+        return self._api.get_account(self._account_id)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return additional state attributes."""
+        if self.coordinator.stale:
+            return {"stale": True}
+        if self.coordinator_context is None:
+            return None
+        last_updated = self.coordinator.get_last_updated(self.coordinator_context)
+        if last_updated is None:
+            return None
+        # showing the last good data of a resource that failed to refresh.
+        return {"stale": True, "last_updated": last_updated.isoformat()}
 
     @property
     def unique_id(self) -> str:
@@ -53,38 +291,63 @@ class ManagedAccountEntity(CoordinatorEntity, Entity):
             entry_type=dr.DeviceEntryType.SERVICE
         )
 
+    async def _async_optimistic(self, state: bool, command: Awaitable) -> None:
+        """Show a state straight away while a command is sent, rolling back if it fails."""
+        self._optimistic_state = state
+        self.async_write_ha_state()
+        try:
+            await command
+        finally:
+            self._optimistic_state = None
+            self.async_write_ha_state()
+
+    async def _async_set_application_blocked(self, app: Application, blocked: bool):
+        """Queue a command to block or unblock an application."""
+        await self.coordinator.async_set_application_blocked(
+            self._account_id, app.app_id, blocked)
+
+    def _get_api_application(self, name: str) -> Application:
+        """Return the pyfamilysafety application for a given app name."""
+        try:
+            app_id = self._account.get_application_by_name(name).app_id
+        except KeyError as err:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="invalid_application"
+            ) from err
+        return self._api_account.get_application(app_id)
+
     async def async_block_application(self, name: str):
         """Blocks a application with a given app name."""
-        await [a for a in self._account.applications if a.name == name][0].block_app()
+        await self._async_set_application_blocked(self._get_api_application(name), True)
 
     async def async_unblock_application(self, name: str):
         """Blocks a application with a given app name."""
-        await [a for a in self._account.applications if a.name == name][0].unblock_app()
+        await self._async_set_application_blocked(self._get_api_application(name), False)
 
     async def async_approve_request(self, request_id: str, extension_time: int):
         """Approve a pending request."""
         try:
-            await self.coordinator.api.approve_pending_request(
-                request_id=request_id,
-                extension_time=extension_time
-            )
+            await self.coordinator.async_answer_request(request_id, True, extension_time)
         except ValueError:
             raise ServiceValidationError(
                 translation_domain=DOMAIN,
                 translation_key="invalid_request_id"
             )
-        self.schedule_update_ha_state()
+        # the library refreshes pending requests after answering one.
+        self.coordinator.async_pending_requests_changed()
 
     async def async_deny_request(self, request_id: str):
         """Deny a pending request."""
         try:
-            await self.coordinator.api.deny_pending_request(request_id=request_id)
+            await self.coordinator.async_answer_request(request_id, False)
         except ValueError:
             raise ServiceValidationError(
                 translation_domain=DOMAIN,
                 translation_key="invalid_request_id"
             )
-        self.schedule_update_ha_state()
+        # the library refreshes pending requests after answering one.
+        self.coordinator.async_pending_requests_changed()
 
 
 class ApplicationEntity(ManagedAccountEntity):
@@ -96,19 +359,38 @@ class ApplicationEntity(ManagedAccountEntity):
                  account_id,
                  app_id: str) -> None:
         """Create a application entity."""
+        if idx is None:
+            idx = frozenset({(account_id, Resource.SCREENTIME, app_id)})
         super().__init__(coordinator, idx, account_id,
                          f"override_{str(app_id).lower()}")
         self._app_id = app_id
 
     @property
-    def _application(self) -> Application:
+    def _application(self) -> ApplicationSnapshot:
         """Get the application."""
         return self._account.get_application(self._app_id)
 
+    @property
+    def _application_name(self) -> str:
+        """Get the application name, the ID if not in the snapshot."""
+        app = self._account.applications.get(self._app_id)
+        return self._app_id if app is None else app.name
+
+    @property
+    def available(self) -> bool:
+        """Return if the application is in the snapshot of the account."""
+        return super().available and self._app_id in self._account.applications
+
+    @property
+    def _api_application(self) -> Application:
+        """Get the pyfamilysafety application used to send commands."""
+        return self._api_account.get_application(self._app_id)
+
     @property
     def icon(self) -> str | None:
         """Get the application icon."""
-        return self._application.icon
+        app = self._account.applications.get(self._app_id)
+        return None if app is None else app.icon
 
 
 class PlatformOverrideEntity(ManagedAccountEntity):
@@ -121,24 +403,32 @@ class PlatformOverrideEntity(ManagedAccountEntity):
                  platform: OverrideTarget) -> None:
         """Create a PlatformOverride entity."""
         super().__init__(coordinator, idx, account_id,
-                         f"override_{str(platform).lower()}")
+                         f"override_{str(platform).lower()}",
+                         (Resource.OVERRIDES,))
         self._platform = platform
 
     @property
     def _get_override_state(self) -> bool:
         """Get the current state if the override is active or not."""
-        for override in self._account.blocked_platforms:
-            if override == self._platform:
-                return True
-        return False
+        return self._platform in self._account.blocked_platforms
 
     async def _enable_override(self, until: datetime = None):
         """Enable the override."""
         if until is None:
             until = datetime.combine(datetime.today(),
                                      time(hour=0, minute=0, second=0)) + timedelta(days=1)
-        await self._account.override_device(self._platform, OverrideType.UNTIL, valid_until=until)
+        account = self._api_account
+        await self.coordinator.commands.async_send(
+            self._account_id,
+            (Resource.OVERRIDES, self._platform),
+            lambda: account.override_device(self._platform, OverrideType.UNTIL, valid_until=until)
+        )
 
     async def _disable_override(self):
         """Disable the override."""
-        await self._account.override_device(self._platform, OverrideType.CANCEL)
+        account = self._api_account
+        await self.coordinator.commands.async_send(
+            self._account_id,
+            (Resource.OVERRIDES, self._platform),
+            lambda: account.override_device(self._platform, OverrideType.CANCEL)
+        )
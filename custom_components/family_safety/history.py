@@ -0,0 +1,216 @@
+"""Local hourly screentime history of accounts, applications and devices."""
+
+import logging
+from array import array
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STORAGE_VERSION, STORAGE_SAVE_DELAY, HISTORY_RETENTION_HOURS
+from .snapshot import AccountSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _hour(when: datetime) -> int:
+    """Return the number of hours since the epoch."""
+    return int(when.timestamp() // 3600)
+
+
+def _local_date(hour: int) -> date:
+    """Return the local date of an hour since the epoch."""
+    return dt_util.as_local(dt_util.utc_from_timestamp(hour * 3600)).date()
+
+
+def account_key(user_id: str) -> str:
+    """Return the history key of the total screentime of an account."""
+    return user_id
+
+
+def application_key(user_id: str, app_id: str) -> str:
+    """Return the history key of an application of an account."""
+    return f"{user_id}/app/{app_id}"
+
+
+def device_key(user_id: str, device_id: str) -> str:
+    """Return the history key of a device of an account."""
+    return f"{user_id}/device/{device_id}"
+
+
+def parse_key(key: str) -> tuple[str, str | None, str | None]:
+    """Return the user ID, kind ("app" or "device") and ID of a history key."""
+    user_id, _, rest = key.partition("/")
+    if not rest:
+        return user_id, None, None
+    kind, _, item_id = rest.partition("/")
+    return user_id, kind, item_id
+
+
+class _Series:
+    """Minutes used per hour, kept in a fixed size ring of hourly buckets."""
+
+    __slots__ = ("buckets", "last_hour", "last_value")
+
+    def __init__(self, size: int) -> None:
+        """Create an empty series."""
+        self.buckets = array("d", bytes(8 * size))
+        self.last_hour: int | None = None
+        self.last_value: float | None = None
+
+    def _advance(self, hour: int) -> None:
+        """Clear the buckets of the hours passed since the last update."""
+        if self.last_hour is not None and hour > self.last_hour:
+            size = len(self.buckets)
+            for skipped in range(self.last_hour + 1, min(hour, self.last_hour + size) + 1):
+                self.buckets[skipped % size] = 0
+        if self.last_hour is None or hour > self.last_hour:
+            self.last_hour = hour
+
+    def add(self, hour: int, used_today: float) -> bool:
+        """Record the usage so far today, returns if the usage changed."""
+        last_hour = self.last_hour
+        self._advance(hour)
+        if self.last_value is None or last_hour is None:
+            # usage before the first observation is not attributed to an hour.
+            delta = 0.0
+        elif used_today < self.last_value or _local_date(hour) != _local_date(last_hour):
+            # usage is reset at the start of each local day.
+            delta = used_today
+        else:
+            delta = used_today - self.last_value
+        self.last_value = used_today
+        if delta:
+            self.buckets[hour % len(self.buckets)] += delta
+        return bool(delta)
+
+    def hours(self, start: int, end: int) -> Iterator[tuple[int, float]]:
+        """Yield the hour and usage of each retained hour in [start, end)."""
+        if self.last_hour is None:
+            return
+        size = len(self.buckets)
+        for hour in range(max(start, self.last_hour - size + 1), min(end, self.last_hour + 1)):
+            yield hour, self.buckets[hour % size]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable dict, only hours with usage are kept."""
+        return {
+            "last_hour": self.last_hour,
+            "last_value": self.last_value,
+            "hours": {str(h): round(v, 3) for h, v in self.hours(0, self.last_hour + 1) if v}
+            if self.last_hour is not None else {}
+        }
+
+    @classmethod
+    def from_dict(cls, size: int, data: dict[str, Any]) -> "_Series":
+        """Create from a dict returned by as_dict."""
+        series = cls(size)
+        series.last_hour = data["last_hour"]
+        series.last_value = data["last_value"]
+        for hour, value in data["hours"].items():
+            if series.last_hour is not None and int(hour) > series.last_hour - size:
+                series.buckets[int(hour) % size] = value
+        return series
+
+
+class UsageHistory:
+    """Hourly usage of each account, application and device.
+
+    Fed from the screentime refreshes of the coordinator, each series keeps a
+    bounded number of hourly buckets so daily and weekly totals can be
+    calculated without querying the recorder or calling the API. Usage is
+    persisted so totals survive a restart.
+    """
+
+    def __init__(self,
+                 hass: HomeAssistant,
+                 entry_id: str,
+                 retention_hours: int = HISTORY_RETENTION_HOURS) -> None:
+        """Create a UsageHistory."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.history")
+        self._size = retention_hours
+        self._series: dict[str, _Series] = {}
+
+    async def async_load(self) -> None:
+        """Load the persisted history."""
+        data = await self._store.async_load()
+        if data is None:
+            return
+        for key, series in data.get("series", {}).items():
+            try:
+                loaded = _Series.from_dict(self._size, series)
+            except (KeyError, TypeError, ValueError) as err:
+                _LOGGER.debug("Ignoring invalid history of %s: %s", key, err)
+                continue
+            current = self._series.get(key)
+            if current is not None and current.last_hour is not None:
+                # recorded since starting, attribute usage since the last persisted value.
+                loaded.add(current.last_hour, current.last_value)
+            self._series[key] = loaded
+
+    async def async_remove(self) -> None:
+        """Remove the persisted history."""
+        await self._store.async_remove()
+
+    def _data_to_store(self) -> dict:
+        """Return the history to persist."""
+        return {"series": {k: s.as_dict() for k, s in self._series.items()}}
+
+    def _record(self, key: str, hour: int, used_today: float) -> bool:
+        """Record the usage of a single series."""
+        series = self._series.get(key)
+        if series is None:
+            if not used_today:
+                return False
+            series = self._series[key] = _Series(self._size)
+        return series.add(hour, used_today)
+
+    @callback
+    def async_record(self, account: AccountSnapshot, now: datetime | None = None) -> None:
+        """Record the usage so far today of an account, its applications and devices."""
+        hour = _hour(now or dt_util.utcnow())
+        changed = self._record(
+            account_key(account.user_id), hour, (account.today_screentime_usage or 0) / 60000)
+        for app in account.applications.values():
+            changed |= self._record(application_key(account.user_id, app.app_id), hour, app.usage)
+        for device in account.devices:
+            changed |= self._record(
+                device_key(account.user_id, device.device_id), hour,
+                (device.today_time_used or 0) / 60000)
+        if changed:
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys of all series."""
+        return iter(list(self._series))
+
+    def hourly(self, key: str, start: datetime, end: datetime) -> list[tuple[datetime, float]]:
+        """Return the start time and minutes used of each hour between start and end."""
+        series = self._series.get(key)
+        if series is None:
+            return []
+        return [
+            (dt_util.utc_from_timestamp(hour * 3600), value)
+            for hour, value in series.hours(_hour(start), _hour(end))
+        ]
+
+    def get_usage(self, key: str, start: datetime, end: datetime | None = None) -> float:
+        """Return the minutes used between start and end (now if not given)."""
+        series = self._series.get(key)
+        if series is None:
+            return 0
+        end_hour = _hour(end) if end is not None else (series.last_hour or 0) + 1
+        return round(sum(v for _, v in series.hours(_hour(start), end_hour)), 2)
+
+    def get_daily_usage(self, key: str, days: int) -> dict[str, float]:
+        """Return the minutes used on each of the last days, by local date."""
+        today = dt_util.start_of_local_day()
+        usage = {}
+        for offset in range(days - 1, -1, -1):
+            start = today - timedelta(days=offset)
+            usage[start.date().isoformat()] = self.get_usage(
+                key, start, start + timedelta(days=1))
+        return usage
@@ -0,0 +1,151 @@
+"""Timings and counters of refreshes and API calls."""
+
+import logging
+import time
+from collections import Counter, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from pyfamilysafety import FamilySafety
+
+from .const import METRICS_WINDOW
+from .resilience import is_not_modified
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Rolling window of the most recent durations of an operation."""
+
+    __slots__ = ("count", "total", "_samples")
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        """Create an empty histogram."""
+        self.count = 0
+        self.total = 0.0
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        """Record a duration."""
+        self.count += 1
+        self.total += seconds
+        self._samples.append(seconds)
+
+    @property
+    def last(self) -> float | None:
+        """Return the most recent duration."""
+        return self._samples[-1] if self._samples else None
+
+    def percentile(self, percent: float) -> float | None:
+        """Return a percentile of the durations in the window."""
+        if not self._samples:
+            return None
+        samples = sorted(self._samples)
+        return samples[min(int(len(samples) * percent / 100), len(samples) - 1)]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a summary in milliseconds."""
+        if not self._samples:
+            return {"count": self.count}
+        return {
+            "count": self.count,
+            "last_ms": round(self.last * 1000, 1),
+            "p50_ms": round(self.percentile(50) * 1000, 1),
+            "p95_ms": round(self.percentile(95) * 1000, 1),
+            "max_ms": round(max(self._samples) * 1000, 1)
+        }
+
+
+class Metrics:
+    """Per phase timings, API calls, errors and bytes received.
+
+    Phases are the stages of a refresh: token refresh, fetch (all API calls
+    of the refresh), merge (fingerprinting and building the snapshot) and
+    dispatch (notifying entities). Each API call is timed by endpoint. Calls
+    slower than slow_call_threshold seconds are logged when it is set.
+    """
+
+    def __init__(self, slow_call_threshold: float = 0) -> None:
+        """Create empty metrics."""
+        self.slow_call_threshold = slow_call_threshold
+        self.phases: dict[str, Histogram] = {}
+        self.calls: dict[str, Histogram] = {}
+        self.api_calls: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.bytes_received = 0
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Record the duration of a phase of a refresh."""
+        self.phases.setdefault(phase, Histogram()).add(seconds)
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """Time a phase of a refresh."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - started)
+
+    def record_call(self,
+                    endpoint: str,
+                    seconds: float,
+                    size: int = 0,
+                    error: Exception | None = None) -> None:
+        """Record a single API call."""
+        self.api_calls[endpoint] += 1
+        self.calls.setdefault(endpoint, Histogram()).add(seconds)
+        self.bytes_received += size
+        if error is not None:
+            self.errors[type(error).__name__] += 1
+        if self.slow_call_threshold and seconds > self.slow_call_threshold:
+            _LOGGER.warning("Slow call to %s took %.2f seconds (%s)",
+                            endpoint, seconds, "failed" if error else "succeeded")
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable summary."""
+        return {
+            "phases": {k: v.as_dict() for k, v in self.phases.items()},
+            "calls": {k: v.as_dict() for k, v in self.calls.items()},
+            "api_calls": sum(self.api_calls.values()),
+            "errors": dict(self.errors),
+            "bytes_received": self.bytes_received
+        }
+
+
+def _response_bytes(response: dict[str, Any]) -> int:
+    """Return the bytes of a response, from its Content-Length header where sent."""
+    length = (response.get("headers") or {}).get("Content-Length")
+    if length is not None and length.isdigit():
+        return int(length)
+    return len((response.get("text") or "").encode())
+
+
+def instrument_client(family_safety: FamilySafety, metrics: Metrics) -> None:
+    """Record every request and token refresh of a client into metrics.
+
+    The library calls send_request and perform_refresh on the instances, so
+    both are wrapped in place.
+    """
+    api = family_safety.api
+    send_request = api.send_request
+    perform_refresh = api.authenticator.perform_refresh
+
+    async def _send_request(endpoint: str, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await send_request(endpoint, *args, **kwargs)
+        except Exception as err:
+            metrics.record_call(endpoint, time.perf_counter() - started,
+                                error=None if is_not_modified(err) else err)
+            raise
+        metrics.record_call(endpoint, time.perf_counter() - started, _response_bytes(response))
+        return response
+
+    async def _perform_refresh(*args, **kwargs):
+        with metrics.measure("token_refresh"):
+            return await perform_refresh(*args, **kwargs)
+
+    api.send_request = _send_request
+    api.authenticator.perform_refresh = _perform_refresh
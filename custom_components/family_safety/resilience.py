@@ -0,0 +1,123 @@
+"""Retry and circuit breaker helpers for Family Safety API calls."""
+
+import asyncio
+import logging
+import random
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+import aiohttp
+
+from pyfamilysafety.exceptions import AggregatorException, HttpException, Unauthorized
+
+from .const import (
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    CIRCUIT_MAX_RESET_TIMEOUT
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CircuitOpen(Exception):
+    """A call was skipped as the circuit breaker is open."""
+
+
+def is_transient(err: Exception) -> bool:
+    """Return if an error is worth retrying.
+
+    Aggregator errors are left to the circuit breaker, retrying them would
+    multiply the requests sent while the service is down.
+    """
+    if isinstance(err, Unauthorized | AggregatorException):
+        return False
+    if isinstance(err, TimeoutError | aiohttp.ClientError):
+        return True
+    if isinstance(err, HttpException) and len(err.args) > 1 and isinstance(err.args[1], int):
+        return err.args[1] >= 500 or err.args[1] == 429
+    return False
+
+
+def is_not_modified(err: Exception) -> bool:
+    """Return if an error is the API answering a conditional request with 304 Not Modified."""
+    return isinstance(err, HttpException) and len(err.args) > 1 and err.args[1] == 304
+
+
+def _jitter(delay: float) -> float:
+    """Return a random delay between half and all of the given delay."""
+    return random.uniform(delay / 2, delay)
+
+
+async def async_retry(func: Callable[[], Awaitable[Any]],
+                      attempts: int = RETRY_ATTEMPTS,
+                      base_delay: float = RETRY_BASE_DELAY,
+                      max_delay: float = RETRY_MAX_DELAY) -> Any:
+    """Call func, retrying transient errors with jittered exponential backoff."""
+    for attempt in range(attempts):
+        try:
+            return await func()
+        except Exception as err:
+            if attempt == attempts - 1 or not is_transient(err):
+                raise
+            delay = _jitter(min(base_delay * (2 ** attempt), max_delay))
+            _LOGGER.debug("Retrying in %.1f seconds after %s", delay, err)
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """Stops calling the API after repeated aggregator failures.
+
+    The circuit opens after a number of consecutive failed updates. Once the
+    reset timeout has passed a single update is allowed (half open), if that
+    update fails the circuit opens again with twice the timeout.
+    """
+
+    def __init__(self,
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: timedelta = CIRCUIT_RESET_TIMEOUT,
+                 max_reset_timeout: timedelta = CIRCUIT_MAX_RESET_TIMEOUT) -> None:
+        """Create a CircuitBreaker."""
+        self.failure_threshold = failure_threshold
+        self.failures = 0
+        self.opened_at: datetime | None = None
+        self.retry_at: datetime | None = None
+        self._reset_timeout = reset_timeout
+        self._max_reset_timeout = max_reset_timeout
+        self._timeout = reset_timeout
+
+    @property
+    def state(self) -> str:
+        """Return the state of the circuit."""
+        if self.opened_at is None:
+            return "closed"
+        return "open"
+
+    def allow_request(self, now: datetime) -> bool:
+        """Return if a request is allowed."""
+        return self.retry_at is None or now >= self.retry_at
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful update."""
+        if self.opened_at is not None:
+            _LOGGER.info("API recovered, closing circuit breaker")
+        self.failures = 0
+        self.opened_at = None
+        self.retry_at = None
+        self._timeout = self._reset_timeout
+
+    def record_failure(self, now: datetime) -> None:
+        """Record a failed update, opening the circuit when required."""
+        self.failures += 1
+        if self.opened_at is not None:
+            # failed while half open.
+            self._timeout = min(self._timeout * 2, self._max_reset_timeout)
+        elif self.failures < self.failure_threshold:
+            return
+        else:
+            self.opened_at = now
+        self.retry_at = now + timedelta(seconds=_jitter(self._timeout.total_seconds()))
+        _LOGGER.warning("Circuit breaker open, not calling the API until %s", self.retry_at)
@@ -0,0 +1,123 @@
+"""Cache of responses of slowly changing endpoints."""
+
+import logging
+import time
+from collections.abc import Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from pyfamilysafety import FamilySafety
+from pyfamilysafety.const import USER_AGENT
+
+from .const import RESPONSE_CACHE_ENDPOINTS, RESPONSE_CACHE_TTL
+from .resilience import is_not_modified
+
+_LOGGER = logging.getLogger(__name__)
+
+# headers the library sends when a request doesn't give its own.
+_DEFAULT_HEADERS = {"User-Agent": USER_AGENT, "Content-Type": "application/json"}
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """The last response of an endpoint and how to recognise it again."""
+
+    response: dict[str, Any]
+    digest: int
+    etag: str | None
+    last_modified: str | None
+    expires: float
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Return headers asking the API to answer 304 if the response is unchanged."""
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """The last response of each cached endpoint by its arguments.
+
+    When a response is unchanged the cached response is returned in its
+    place, so callers can tell by identity that the parsed JSON is the same
+    as last time and skip rebuilding models from it. Where the API sends an
+    ETag or Last-Modified header the next request is conditional and a 304
+    answer is not downloaded or parsed at all, otherwise responses are
+    compared by a hash of the body. Entries expire after ttl seconds, so
+    models are rebuilt from a new response at least that often.
+    """
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL) -> None:
+        """Create an empty cache."""
+        self.ttl = ttl
+        self._entries: dict[Hashable, CachedResponse] = {}
+        self.hits = 0
+        self.not_modified = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> CachedResponse | None:
+        """Return the unexpired response of a request."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def store(self, key: Hashable, response: dict[str, Any]) -> dict[str, Any]:
+        """Store a response, returns the cached response instead if it is unchanged."""
+        digest = hash(response.get("text"))
+        entry = self.get(key)
+        if entry is not None and entry.digest == digest:
+            self.hits += 1
+            return entry.response
+        self.misses += 1
+        now = time.monotonic()
+        # arguments such as the day of a screentime report change, drop stale entries.
+        self._entries = {k: v for k, v in self._entries.items() if v.expires > now}
+        headers = response.get("headers") or {}
+        self._entries[key] = CachedResponse(
+            response=response,
+            digest=digest,
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            expires=now + self.ttl
+        )
+        return response
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable summary."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "not_modified": self.not_modified,
+            "misses": self.misses
+        }
+
+
+def cache_client(family_safety: FamilySafety, cache: ResponseCache) -> None:
+    """Serve unchanged responses of a client's slowly changing endpoints from the cache."""
+    api = family_safety.api
+    send_request = api.send_request
+
+    async def _send_request(endpoint: str, body: object = None, headers: dict = None,
+                            platform: str = None, **kwargs):
+        if endpoint not in RESPONSE_CACHE_ENDPOINTS or body is not None:
+            return await send_request(endpoint, body, headers, platform, **kwargs)
+        key = (endpoint, platform, tuple(sorted(kwargs.items())))
+        entry = cache.get(key)
+        if entry is not None and (conditional := entry.conditional_headers()):
+            headers = {**(headers if headers is not None else _DEFAULT_HEADERS), **conditional}
+        try:
+            response = await send_request(endpoint, body, headers, platform, **kwargs)
+        except Exception as err:
+            if entry is None or not is_not_modified(err):
+                raise
+            _LOGGER.debug("%s not modified", endpoint)
+            cache.not_modified += 1
+            return entry.response
+        return cache.store(key, response)
+
+    api.send_request = _send_request
@@ -0,0 +1,169 @@
+"""Request budget shared by all Family Safety config entries."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from datetime import timedelta
+from typing import Any
+
+from pyfamilysafety import FamilySafety
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, REQUEST_BUDGET_RATE, REQUEST_BUDGET_BURST
+
+_LOGGER = logging.getLogger(__name__)
+
+# spreads any number of slots evenly over an interval.
+_GOLDEN_RATIO = 0.6180339887
+
+
+class RequestBudget:
+    """Token bucket allowing a burst of requests and then rate requests per second.
+
+    Callers wait for a token before taking their concurrency slot, the token
+    is only taken when the request is sent. Requests sent together may take
+    the bucket below zero, later callers then wait until it has refilled.
+    """
+
+    def __init__(self, rate: float = REQUEST_BUDGET_RATE, burst: int = REQUEST_BUDGET_BURST) -> None:
+        """Create a full bucket."""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    @property
+    def tokens(self) -> float:
+        """Return the requests that can be sent without waiting."""
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._updated) * self.rate, self.burst)
+        self._updated = now
+        return self._tokens
+
+    async def async_wait(self) -> float:
+        """Wait until a token is available, returns the seconds waited."""
+        waited = 0.0
+        while (tokens := self.tokens) < 1:
+            delay = (1 - tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+    def take(self) -> None:
+        """Take a token for a request being sent."""
+        self._tokens = self.tokens - 1
+
+
+class RequestScheduler:
+    """Coordinates the API calls of all config entries.
+
+    Every request takes a token from a shared budget, so several entries (or
+    several families) can't exceed the rate Microsoft tolerates together.
+    Identical reads sent while one is in flight share its response instead
+    of being sent again. Each entry is given a slot that offsets its refreshes
+    so the entries don't all poll at the same moment.
+    """
+
+    def __init__(self) -> None:
+        """Create a RequestScheduler."""
+        self.budget = RequestBudget()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._slots: dict[str, int] = {}
+        self.requests = 0
+        self.deduplicated = 0
+        self.throttled = 0
+
+    @callback
+    def async_register(self, entry_id: str) -> int:
+        """Return the slot of a config entry, reusing the slots of unloaded entries."""
+        if entry_id not in self._slots:
+            used = set(self._slots.values())
+            self._slots[entry_id] = next(i for i in range(len(used) + 1) if i not in used)
+        return self._slots[entry_id]
+
+    @callback
+    def async_unregister(self, entry_id: str) -> None:
+        """Free the slot of an unloaded config entry."""
+        self._slots.pop(entry_id, None)
+
+    def stagger(self, entry_id: str, interval: timedelta) -> timedelta:
+        """Return how far the refreshes of a config entry are offset within an interval."""
+        return interval * ((self._slots.get(entry_id, 0) * _GOLDEN_RATIO) % 1)
+
+    async def async_wait(self) -> float:
+        """Wait until the budget allows another request, returns the seconds waited.
+
+        Called before taking a concurrency slot and starting the request
+        timeout, so time spent waiting for the budget never times out a call.
+        """
+        waited = await self.budget.async_wait()
+        if waited:
+            self.throttled += 1
+            _LOGGER.debug("Request budget exhausted, waited %.1f seconds", waited)
+        return waited
+
+    async def async_request(self,
+                            key: Hashable | None,
+                            func: Callable[[], Awaitable[Any]]) -> Any:
+        """Send a request taking a token from the budget.
+
+        Requests with the same key while one is in flight get its response,
+        a key of None is never shared.
+        """
+        if key is not None and key in self._inflight:
+            self.deduplicated += 1
+            return await asyncio.shield(self._inflight[key])
+        self.budget.take()
+        self.requests += 1
+        if key is None:
+            return await func()
+        task = asyncio.get_running_loop().create_task(func())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # a caller timing out does not cancel the request for the others.
+        return await asyncio.shield(task)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable summary."""
+        return {
+            "tokens": round(self.budget.tokens, 1),
+            "rate": self.budget.rate,
+            "burst": self.budget.burst,
+            "entries": len(self._slots),
+            "requests": self.requests,
+            "deduplicated": self.deduplicated,
+            "throttled": self.throttled
+        }
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> RequestScheduler:
+    """Return the scheduler shared by all config entries."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if "scheduler" not in data:
+        data["scheduler"] = RequestScheduler()
+    return data["scheduler"]
+
+
+def schedule_client(family_safety: FamilySafety, scheduler: RequestScheduler) -> None:
+    """Send every request of a client through the scheduler.
+
+    Identical reads are only shared within the client, other entries use
+    other credentials and their reads must not depend on this client's
+    token and session.
+    """
+    api = family_safety.api
+    send_request = api.send_request
+
+    async def _send_request(endpoint: str, body: object = None, headers: dict = None,
+                            platform: str = None, **kwargs):
+        key = None
+        if endpoint.startswith("get_") and body is None:
+            key = (id(api), endpoint, platform, tuple(sorted(kwargs.items())),
+                   tuple(sorted((headers or {}).items())))
+        return await scheduler.async_request(
+            key, lambda: send_request(endpoint, body, headers, platform, **kwargs))
+
+    api.send_request = _send_request
@@ -2,28 +2,48 @@
 
 from collections.abc import Mapping, Callable
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 from typing import Any
 
 import voluptuous as vol
 
-from pyfamilysafety import Account
-from pyfamilysafety.application import Application
-
-from homeassistant.components.sensor import SensorEntity, SensorEntityDescription, SensorDeviceClass
-from homeassistant.core import HomeAssistant
+from homeassistant.components.sensor import (
+    DOMAIN as SENSOR_DOMAIN,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorDeviceClass,
+    SensorStateClass
+)
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import (
     AddEntitiesCallback,
     async_get_current_platform,
 )
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.util import dt as dt_util
 
 from .coordinator import FamilySafetyCoordinator
 
-from .const import CONF_KEY_EXPR, CONF_EXPR_DEFAULT
+from .const import (
+    CONF_KEY_EXPR,
+    CONF_EXPR_DEFAULT,
+    CONF_KEY_STATISTICS,
+    CONF_STATISTICS_DEFAULT,
+    Resource
+)
 from .config_entry import FamilySafetyConfigEntry
 
-from .entity_base import ManagedAccountEntity
+from .entity_base import (
+    FamilySafetyEntity,
+    ManagedAccountEntity,
+    async_add_account_entities,
+    async_add_application_entities,
+    async_disable_application_entities
+)
+from .history import account_key
+from .snapshot import AccountSnapshot, ApplicationSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,7 +55,71 @@ class FamilySafetySensorEntityDescription(SensorEntityDescription):
     value_fn: Callable[[ManagedAccountEntity], str | int | datetime]
     name_fn: Callable[[ManagedAccountEntity], str]
     native_unit_of_measurement_fn: Callable[[ManagedAccountEntity], str]
+    resources: tuple[Resource, ...] = (Resource.SCREENTIME,)
+
+
+@dataclass(frozen=True, kw_only=True)
+class FamilySafetyDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes family_safety diagnostic sensor entity."""
+
+    value_fn: Callable[[FamilySafetyCoordinator], str | int | float]
+    attributes_fn: Callable[[FamilySafetyCoordinator], Mapping[str, Any]] | None = None
+
 
+def _last_duration(coordinator: FamilySafetyCoordinator, phase: str) -> float | None:
+    """Return the seconds taken by the last run of a refresh phase."""
+    histogram = coordinator.metrics.phases.get(phase)
+    if histogram is None or histogram.last is None:
+        return None
+    return round(histogram.last, 3)
+
+
+DIAG_SENSORS: dict[str, FamilySafetyDiagnosticSensorEntityDescription] = {
+    "update_interval": FamilySafetyDiagnosticSensorEntityDescription(
+        key="update_interval",
+        name="Family Safety Update Interval",
+        value_fn=lambda coordinator: coordinator.update_interval.total_seconds(),
+        attributes_fn=lambda coordinator: {
+            "reason": str(coordinator.interval_reason),
+            "adaptive": coordinator.adaptive
+        },
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC
+    ),
+    "refresh_duration": FamilySafetyDiagnosticSensorEntityDescription(
+        key="refresh_duration",
+        name="Family Safety Refresh Duration",
+        value_fn=lambda coordinator: _last_duration(coordinator, "refresh"),
+        attributes_fn=lambda coordinator: {
+            "phases": {k: v.as_dict() for k, v in coordinator.metrics.phases.items()},
+            "endpoints": {k: v.as_dict() for k, v in coordinator.metrics.calls.items()}
+        },
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC
+    ),
+    "api_calls": FamilySafetyDiagnosticSensorEntityDescription(
+        key="api_calls",
+        name="Family Safety API Calls",
+        value_fn=lambda coordinator: sum(coordinator.metrics.api_calls.values()),
+        attributes_fn=lambda coordinator: {
+            "endpoints": dict(coordinator.metrics.api_calls),
+            "bytes_received": coordinator.metrics.bytes_received
+        },
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC
+    ),
+    "api_errors": FamilySafetyDiagnosticSensorEntityDescription(
+        key="api_errors",
+        name="Family Safety API Errors",
+        value_fn=lambda coordinator: sum(coordinator.metrics.errors.values()),
+        attributes_fn=lambda coordinator: {"errors": dict(coordinator.metrics.errors)},
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC
+    )
+}
 
 GEN_SENSORS: dict[str, FamilySafetySensorEntityDescription] = {
     "account_balance": FamilySafetySensorEntityDescription(
@@ -44,16 +128,17 @@ GEN_SENSORS: dict[str, FamilySafetySensorEntityDescription] = {
         device_class=SensorDeviceClass.MONETARY,
         name_fn=lambda data: f"{data._account.first_name} Available Balance",
         native_unit_of_measurement_fn=lambda data: data._account.account_currency,
+        resources=(Resource.BALANCE,)
     )
 }
 
 EXPR_SENSORS: dict = {
     "pending_requests": FamilySafetySensorEntityDescription(
         key="pending_requests",
-        value_fn=lambda data: len(
-            [d for d in data.coordinator.api.pending_requests if d["puid"] == data._account_id]),
+        value_fn=lambda data: len(data._account.pending_requests),
         name_fn=lambda data: f"{data._account.first_name} Pending Requests",
-        native_unit_of_measurement_fn=lambda data: None
+        native_unit_of_measurement_fn=lambda data: None,
+        resources=(Resource.PENDING_REQUESTS,)
     )
 }
 
@@ -64,10 +149,40 @@ TIME_SENSORS: dict[str, FamilySafetySensorEntityDescription] = {
             data._account.today_screentime_usage / 1000) / 60,
         device_class=SensorDeviceClass.DURATION,
         native_unit_of_measurement_fn=lambda data: "min",
-        name_fn=lambda data: f"{data._account.first_name} Used Screen Time"
+        name_fn=lambda data: f"{data._account.first_name} Used Screen Time",
+        resources=(Resource.SCREENTIME,)
     )
 }
 
+HISTORY_SENSORS: dict[str, FamilySafetySensorEntityDescription] = {
+    "screentime_last_7_days": FamilySafetySensorEntityDescription(
+        key="screentime_last_7_days",
+        value_fn=lambda data: data.coordinator.history.get_usage(
+            account_key(data._account_id), dt_util.utcnow() - timedelta(days=7)),
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement_fn=lambda data: "min",
+        name_fn=lambda data: f"{data._account.first_name} Screen Time Last 7 Days",
+        resources=(Resource.SCREENTIME,)
+    ),
+    "screentime_this_week": FamilySafetySensorEntityDescription(
+        key="screentime_this_week",
+        value_fn=lambda data: data.coordinator.history.get_usage(
+            account_key(data._account_id),
+            dt_util.start_of_local_day() - timedelta(days=dt_util.now().weekday())),
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement_fn=lambda data: "min",
+        name_fn=lambda data: f"{data._account.first_name} Screen Time This Week",
+        resources=(Resource.SCREENTIME,)
+    )
+}
+
+
+def _application_unique_id(account_id: str, app_id: str) -> str:
+    """Return the unique ID of the screentime sensor of an application."""
+    return f"{account_id}_{app_id}"
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -75,52 +190,80 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Family Safety sensors."""
-    accounts: list[Account] = config_entry.runtime_data.api.accounts
-    entities = []
-    for account in accounts:
-        if (account.user_id in config_entry.options.get("accounts", [])) or (
-            len(config_entry.options.get("accounts", [])) == 0
-        ):
-            for app in config_entry.options.get("tracked_applications", []):
-                entities.append(ScreentimeSensor(
-                    coordinator=config_entry.runtime_data,
-                    description=FamilySafetySensorEntityDescription(
-                        key=app,
-                        device_class=SensorDeviceClass.DURATION,
-                        native_unit_of_measurement_fn=lambda data: "min",
-                        value_fn=lambda data: data._account.get_application(
-                                app).usage,
-                        name_fn=lambda data: f"{data._account.first_name} {data._account.get_application(app).name} Used Screen Time"),
-                    idx=None,
-                    account_id=account.user_id
-                ))
-            entities.extend(
-                [ScreentimeSensor(
-                    coordinator=config_entry.runtime_data,
-                    idx=None,
-                    account_id=account.user_id,
-                    description=desc
-                ) for desc in TIME_SENSORS.values()]
-            )
+
+    def _account_entities(account: AccountSnapshot) -> list[GenericSensor]:
+        """Return the sensors of a single account."""
+        # usage over time is available as statistics, the attributes aren't recorded.
+        screentime_sensor = (
+            StatisticsScreentimeSensor
+            if config_entry.options.get(CONF_KEY_STATISTICS, CONF_STATISTICS_DEFAULT)
+            else ScreentimeSensor
+        )
+        entities = [screentime_sensor(
+            coordinator=config_entry.runtime_data,
+            idx=None,
+            account_id=account.user_id,
+            description=desc
+        ) for desc in TIME_SENSORS.values()]
+        entities.extend(
+            [GenericSensor(
+                coordinator=config_entry.runtime_data,
+                idx=None,
+                account_id=account.user_id,
+                description=desc
+            ) for desc in GEN_SENSORS.values()]
+        )
+        entities.extend(
+            [HistorySensor(
+                coordinator=config_entry.runtime_data,
+                idx=None,
+                account_id=account.user_id,
+                description=desc
+            ) for desc in HISTORY_SENSORS.values()]
+        )
+        if config_entry.options.get(CONF_KEY_EXPR, CONF_EXPR_DEFAULT):
             entities.extend(
                 [GenericSensor(
                     coordinator=config_entry.runtime_data,
                     idx=None,
                     account_id=account.user_id,
                     description=desc
-                ) for desc in GEN_SENSORS.values()]
+                ) for desc in EXPR_SENSORS.values()]
+            )
+        return entities
+
+    async_add_entities(
+        [DiagnosticSensor(
+            coordinator=config_entry.runtime_data,
+            description=desc
+        ) for desc in DIAG_SENSORS.values()]
+    )
+    async_add_account_entities(config_entry, async_add_entities, _account_entities)
+    if config_entry.options.get(CONF_KEY_STATISTICS, CONF_STATISTICS_DEFAULT):
+        # application usage is imported as statistics instead.
+        async_disable_application_entities(
+            hass, config_entry, SENSOR_DOMAIN, _application_unique_id, disabled=True)
+    else:
+        async_disable_application_entities(
+            hass, config_entry, SENSOR_DOMAIN, _application_unique_id, disabled=False)
+        async_add_application_entities(
+            hass,
+            config_entry,
+            async_add_entities,
+            SENSOR_DOMAIN,
+            unique_id_fn=_application_unique_id,
+            entity_fn=lambda account_id, app_id: ScreentimeSensor(
+                coordinator=config_entry.runtime_data,
+                description=FamilySafetySensorEntityDescription(
+                    key=app_id,
+                    device_class=SensorDeviceClass.DURATION,
+                    native_unit_of_measurement_fn=lambda data: "min",
+                    value_fn=lambda data: data._application.usage,
+                    name_fn=lambda data: f"{data._account.first_name} {data._application_name} Used Screen Time"),
+                idx=None,
+                account_id=account_id
             )
-            if config_entry.options.get(CONF_KEY_EXPR, CONF_EXPR_DEFAULT):
-                entities.extend(
-                    [GenericSensor(
-                        coordinator=config_entry.runtime_data,
-                        idx=None,
-                        account_id=account.user_id,
-                        description=desc
-                    ) for desc in EXPR_SENSORS.values()]
-                )
-
-    async_add_entities(entities, True)
+        )
     # register services
     platform = async_get_current_platform()
     platform.async_register_entity_service(
@@ -154,9 +297,11 @@ async def async_setup_entry(
 class GenericSensor(ManagedAccountEntity, SensorEntity):
     """Use a Basic Sensor."""
 
+    _unrecorded_attributes = frozenset({"daily_usage"})
+
     def __init__(self, coordinator: FamilySafetyCoordinator, description: FamilySafetySensorEntityDescription, idx, account_id) -> None:
         """Use a Basic Sensor."""
-        super().__init__(coordinator, idx, account_id, description.key)
+        super().__init__(coordinator, idx, account_id, description.key, description.resources)
         self.entity_description = description
 
     @property
@@ -182,10 +327,30 @@ class GenericSensor(ManagedAccountEntity, SensorEntity):
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
         """Return additional state attributes."""
+        attributes = dict(super().extra_state_attributes or {})
         if self.entity_description.key == "pending_requests":
-            return {
-                "requests": [d for d in self.coordinator.api.pending_requests if d["puid"] == self._account_id]
-            }
+            attributes["requests"] = list(self._account.pending_requests)
+        elif self.entity_description.key == "screentime_last_7_days":
+            attributes["daily_usage"] = self.coordinator.history.get_daily_usage(
+                account_key(self._account_id), 7)
+        return attributes or None
+
+
+class HistorySensor(GenericSensor):
+    """Screen time over a period from the usage history."""
+
+    async def async_added_to_hass(self) -> None:
+        """Also update when hours leave the period or a new week starts."""
+        await super().async_added_to_hass()
+        # every quarter hour, as history hours are UTC hours and local time
+        # may be offset from UTC by 30 or 45 minutes.
+        self.async_on_remove(async_track_time_change(
+            self.hass, self._async_period_changed, minute="/15", second=0))
+
+    @callback
+    def _async_period_changed(self, _now: datetime) -> None:
+        """Update the state while the account is idle."""
+        self.async_write_ha_state()
 
 
 class ScreentimeSensor(GenericSensor, SensorEntity):
@@ -193,6 +358,8 @@ class ScreentimeSensor(GenericSensor, SensorEntity):
 
     def __init__(self, coordinator: FamilySafetyCoordinator, description: FamilySafetySensorEntityDescription, idx, account_id) -> None:
         """Screentime Sensor."""
+        if idx is None and description.key != "screentime":
+            idx = frozenset({(account_id, Resource.SCREENTIME, description.key)})
         super().__init__(coordinator, description, idx, account_id)
         if description.key == "screentime":
             self.app_id = None
@@ -200,24 +367,62 @@ class ScreentimeSensor(GenericSensor, SensorEntity):
             self.app_id = description.key
 
     @property
-    def _application(self) -> Application:
+    def _application(self) -> ApplicationSnapshot:
         """Get the application."""
         return self._account.get_application(self.app_id)
 
+    @property
+    def _application_name(self) -> str:
+        """Get the application name, the ID if not in the snapshot."""
+        app = self._account.applications.get(self.app_id)
+        return self.app_id if app is None else app.name
+
+    @property
+    def available(self) -> bool:
+        """Return if the application is in the snapshot of the account."""
+        if self.app_id is None:
+            return super().available
+        return super().available and self.app_id in self._account.applications
+
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
         """Return additional state attributes."""
+        attributes = dict(super().extra_state_attributes or {})
         if self.entity_description.key == "screentime":
-            devices = {}
-            for device in self._account.devices:
-                if device.today_time_used:
-                    devices[device.device_name] = (
-                        device.today_time_used / 1000) / 60
-                else:
-                    devices[device.device_name] = 0
-            applications = {}
-            for app in self._account.applications:
-                applications[app.name] = app.usage
-            return {"application_usage": applications, "device_usage": devices}
+            # computed once per refresh when the account snapshot is built.
+            attributes["application_usage"] = self._account.application_usage
+            attributes["device_usage"] = self._account.device_usage
         elif self.app_id is not None:
-            return {"blocked": self._application.blocked}
+            attributes["blocked"] = self._application.blocked
+        return attributes or None
+
+
+class StatisticsScreentimeSensor(ScreentimeSensor):
+    """Aggregate screentime sensor of an entry importing screen time as statistics."""
+
+    # rewritten on every refresh, usage over time is available as statistics.
+    _unrecorded_attributes = frozenset({"application_usage", "device_usage"})
+
+
+class DiagnosticSensor(FamilySafetyEntity, SensorEntity):
+    """Diagnostic sensor describing the coordinator."""
+
+    entity_description: FamilySafetyDiagnosticSensorEntityDescription
+    # summaries of every phase and endpoint change on each refresh.
+    _unrecorded_attributes = frozenset({"phases", "endpoints"})
+
+    def __init__(self, coordinator: FamilySafetyCoordinator, description: FamilySafetyDiagnosticSensorEntityDescription) -> None:
+        """Create a diagnostic sensor."""
+        super().__init__(coordinator, description.key)
+        self.entity_description = description
+
+    @property
+    def native_value(self):
+        """Return the native value of the entity."""
+        return self.entity_description.value_fn(self.coordinator)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return additional state attributes."""
+        if self.entity_description.attributes_fn is not None:
+            return self.entity_description.attributes_fn(self.coordinator)
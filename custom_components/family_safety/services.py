@@ -0,0 +1,194 @@
+"""Family Safety domain services acting on many accounts, applications or requests."""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .const import DOMAIN
+from .config_entry import FamilySafetyConfigEntry
+from .coordinator import FamilySafetyCoordinator
+from .snapshot import AccountSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_ACCOUNTS = "accounts"
+ATTR_APPLICATIONS = "applications"
+ATTR_REQUEST_IDS = "request_ids"
+ATTR_EXTENSION_TIME = "extension_time"
+
+APPS_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_ACCOUNTS): vol.All(cv.ensure_list, [cv.string]),
+    vol.Required(ATTR_APPLICATIONS): vol.All(cv.ensure_list, [cv.string])
+})
+APPROVE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Required(ATTR_REQUEST_IDS): vol.All(cv.ensure_list, [cv.string]),
+    vol.Required(ATTR_EXTENSION_TIME): vol.Coerce(int)
+})
+DENY_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Required(ATTR_REQUEST_IDS): vol.All(cv.ensure_list, [cv.string])
+})
+
+
+def _get_coordinators(hass: HomeAssistant, call: ServiceCall) -> list[FamilySafetyCoordinator]:
+    """Return the coordinators of the loaded entries targeted by a service call."""
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    entries: list[FamilySafetyConfigEntry] = [
+        e for e in hass.config_entries.async_entries(DOMAIN)
+        if e.state is ConfigEntryState.LOADED and entry_id in (None, e.entry_id)
+    ]
+    if not entries:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="invalid_config_entry"
+        )
+    return [e.runtime_data for e in entries]
+
+
+def _match_accounts(coordinator: FamilySafetyCoordinator,
+                    accounts: list[str] | None) -> tuple[list[AccountSnapshot], set[str]]:
+    """Return the accounts matching a user ID or first name, all accounts if None.
+
+    Also returns the given names that matched no account.
+    """
+    if accounts is None:
+        return list(coordinator.data.accounts.values()), set()
+    matched = []
+    unmatched = set(accounts)
+    for account in coordinator.data.accounts.values():
+        names = {n for n in accounts
+                 if n.lower() in (account.user_id.lower(), str(account.first_name).lower())}
+        if names:
+            matched.append(account)
+            unmatched -= names
+    return matched, unmatched
+
+
+async def _async_run(func: Callable[[], Awaitable[Any]], result: dict[str, Any]) -> dict[str, Any]:
+    """Run a single item of a bulk service and record the outcome.
+
+    Commands returning False were rejected by the API.
+    """
+    try:
+        outcome = await func()
+    except Exception as err:
+        _LOGGER.debug("Bulk service item %s failed: %s", result, err)
+        return {**result, "success": False, "error": str(err) or type(err).__name__}
+    if outcome is False:
+        _LOGGER.debug("Bulk service item %s was rejected", result)
+        return {**result, "success": False, "error": "rejected"}
+    return {**result, "success": True}
+
+
+async def _async_set_apps_blocked(hass: HomeAssistant,
+                                  call: ServiceCall,
+                                  blocked: bool) -> ServiceResponse:
+    """Block or unblock applications for many accounts.
+
+    Commands are coalesced per account and sent within the request limit,
+    each account is only rebuilt once.
+    """
+    coros = []
+    results = []
+    invalid = set(call.data.get(ATTR_ACCOUNTS) or [])
+    for coordinator in _get_coordinators(hass, call):
+        accounts, unmatched = _match_accounts(coordinator, call.data.get(ATTR_ACCOUNTS))
+        invalid &= unmatched
+        for account in accounts:
+            for app in call.data[ATTR_APPLICATIONS]:
+                snapshot = account.applications.get(app) or account.applications_by_name.get(app)
+                result = {"account": account.user_id, "application": app}
+                if snapshot is None or coordinator.api is None:
+                    results.append({
+                        **result,
+                        "success": False,
+                        "error": "not_connected" if snapshot else "invalid_application"
+                    })
+                    continue
+                coros.append(_async_run(
+                    lambda c=coordinator, u=account.user_id, a=snapshot.app_id:
+                        c.async_set_application_blocked(u, a, blocked),
+                    {**result, "app_id": snapshot.app_id}
+                ))
+    results.extend(await asyncio.gather(*coros))
+    results.extend(
+        {"account": name, "success": False, "error": "invalid_account"}
+        for name in call.data.get(ATTR_ACCOUNTS) or [] if name in invalid
+    )
+    return {"results": results}
+
+
+async def _async_answer_requests(hass: HomeAssistant,
+                                 call: ServiceCall,
+                                 approve: bool) -> ServiceResponse:
+    """Approve or deny many pending requests.
+
+    The library refetches pending requests after answering one and looks up
+    the next request in them, so requests of a config entry are answered one
+    after another by the coordinator.
+    """
+    results = []
+    for coordinator in _get_coordinators(hass, call):
+        answered = []
+        for request_id in call.data[ATTR_REQUEST_IDS]:
+            if not coordinator.is_pending_request(request_id):
+                continue
+            if coordinator.api is None:
+                results.append({"request_id": request_id, "success": False, "error": "not_connected"})
+                continue
+            answered.append(await _async_run(
+                lambda r=request_id, c=coordinator: c.async_answer_request(
+                    r, approve, call.data.get(ATTR_EXTENSION_TIME, 0)),
+                {"request_id": request_id}))
+        if answered:
+            results.extend(answered)
+            coordinator.async_pending_requests_changed()
+    answered = {r["request_id"] for r in results}
+    results.extend(
+        {"request_id": r, "success": False, "error": "invalid_request_id"}
+        for r in call.data[ATTR_REQUEST_IDS] if r not in answered
+    )
+    return {"results": results}
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the domain services."""
+
+    async def _async_block_apps(call: ServiceCall) -> ServiceResponse:
+        return await _async_set_apps_blocked(hass, call, True)
+
+    async def _async_unblock_apps(call: ServiceCall) -> ServiceResponse:
+        return await _async_set_apps_blocked(hass, call, False)
+
+    async def _async_approve_requests(call: ServiceCall) -> ServiceResponse:
+        return await _async_answer_requests(hass, call, True)
+
+    async def _async_deny_requests(call: ServiceCall) -> ServiceResponse:
+        return await _async_answer_requests(hass, call, False)
+
+    for name, func, schema in (
+        ("block_apps", _async_block_apps, APPS_SCHEMA),
+        ("unblock_apps", _async_unblock_apps, APPS_SCHEMA),
+        ("approve_requests", _async_approve_requests, APPROVE_SCHEMA),
+        ("deny_requests", _async_deny_requests, DENY_SCHEMA)
+    ):
+        hass.services.async_register(
+            DOMAIN, name, func, schema=schema, supports_response=SupportsResponse.OPTIONAL)
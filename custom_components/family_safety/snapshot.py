@@ -0,0 +1,252 @@
+"""Immutable, indexed snapshots of Family Safety data."""
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+
+from pyfamilysafety import Account
+from pyfamilysafety.application import Application
+from pyfamilysafety.device import Device
+from pyfamilysafety.enum import OverrideTarget
+
+_EMPTY: Mapping = MappingProxyType({})
+
+
+@dataclass(frozen=True, slots=True)
+class ApplicationSnapshot:
+    """A single application of an account."""
+
+    app_id: str
+    name: str
+    icon: str | None
+    usage: float
+    blocked: bool
+    policy: Any = None
+
+    @classmethod
+    def from_application(cls, app: Application) -> "ApplicationSnapshot":
+        """Create from a pyfamilysafety application."""
+        return cls(
+            app_id=app.app_id,
+            name=app.name,
+            icon=app.icon,
+            usage=app.usage,
+            blocked=app.blocked,
+            policy=app.policy
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable dict."""
+        return {
+            "app_id": self.app_id,
+            "name": self.name,
+            "icon": self.icon,
+            "usage": self.usage,
+            "blocked": self.blocked,
+            "policy": self.policy
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ApplicationSnapshot":
+        """Create from a dict returned by as_dict."""
+        return cls(**data)
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceSnapshot:
+    """A single device of an account."""
+
+    device_id: str
+    device_name: str
+    today_time_used: int | None
+    last_seen: str | None
+    blocked: bool | None
+
+    @classmethod
+    def from_device(cls, device: Device) -> "DeviceSnapshot":
+        """Create from a pyfamilysafety device."""
+        return cls(
+            device_id=device.device_id,
+            device_name=device.device_name,
+            today_time_used=device.today_time_used,
+            last_seen=device.last_seen,
+            blocked=device.blocked
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable dict."""
+        return {
+            "device_id": self.device_id,
+            "device_name": self.device_name,
+            "today_time_used": self.today_time_used,
+            "last_seen": self.last_seen,
+            "blocked": self.blocked
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "DeviceSnapshot":
+        """Create from a dict returned by as_dict."""
+        return cls(**data)
+
+
+@dataclass(frozen=True, slots=True)
+class AccountSnapshot:
+    """A managed account with its applications indexed by ID and name."""
+
+    user_id: str
+    first_name: str
+    surname: str
+    today_screentime_usage: int | None
+    average_screentime_usage: float | None
+    account_balance: float
+    account_currency: str
+    blocked_platforms: frozenset[OverrideTarget]
+    devices: tuple[DeviceSnapshot, ...]
+    applications: Mapping[str, ApplicationSnapshot] = _EMPTY
+    applications_by_name: Mapping[str, ApplicationSnapshot] = _EMPTY
+    pending_requests: tuple[dict, ...] = ()
+    # precomputed screentime attributes, plain dicts so they can be written as state.
+    application_usage: dict[str, float] | None = None
+    device_usage: dict[str, float] | None = None
+
+    def get_application(self, app_id: str) -> ApplicationSnapshot:
+        """Return a single application by ID."""
+        return self.applications[app_id]
+
+    def get_application_by_name(self, name: str) -> ApplicationSnapshot:
+        """Return a single application by name."""
+        return self.applications_by_name[name]
+
+    @classmethod
+    def from_account(cls,
+                     account: Account,
+                     pending_requests: Iterable[dict],
+                     usage_limit: int = 0,
+                     usage_threshold: float = 0) -> "AccountSnapshot":
+        """Create from a pyfamilysafety account.
+
+        usage_limit restricts the application usage attribute to the top N
+        applications and usage_threshold omits applications used for fewer
+        minutes, 0 disables either limit.
+        """
+        applications = {}
+        applications_by_name = {}
+        for app in account.applications:
+            snapshot = ApplicationSnapshot.from_application(app)
+            applications[snapshot.app_id] = snapshot
+            # the first application wins when names are duplicated.
+            applications_by_name.setdefault(snapshot.name, snapshot)
+        devices = tuple(DeviceSnapshot.from_device(d) for d in account.devices or [])
+        return cls(
+            user_id=account.user_id,
+            first_name=account.first_name,
+            surname=account.surname,
+            today_screentime_usage=account.today_screentime_usage,
+            average_screentime_usage=account.average_screentime_usage,
+            account_balance=account.account_balance,
+            account_currency=account.account_currency,
+            blocked_platforms=frozenset(account.blocked_platforms or []),
+            devices=devices,
+            applications=MappingProxyType(applications),
+            applications_by_name=MappingProxyType(applications_by_name),
+            pending_requests=tuple(pending_requests),
+            application_usage=_application_usage(
+                applications.values(), usage_limit, usage_threshold),
+            device_usage={
+                d.device_name: (d.today_time_used / 1000) / 60 if d.today_time_used else 0
+                for d in devices
+            }
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable dict."""
+        return {
+            "user_id": self.user_id,
+            "first_name": self.first_name,
+            "surname": self.surname,
+            "today_screentime_usage": self.today_screentime_usage,
+            "average_screentime_usage": self.average_screentime_usage,
+            "account_balance": self.account_balance,
+            "account_currency": self.account_currency,
+            "blocked_platforms": [p.name for p in self.blocked_platforms],
+            "devices": [d.as_dict() for d in self.devices],
+            "applications": [a.as_dict() for a in self.applications.values()],
+            "pending_requests": list(self.pending_requests),
+            "application_usage": self.application_usage,
+            "device_usage": self.device_usage
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "AccountSnapshot":
+        """Create from a dict returned by as_dict."""
+        applications = {}
+        applications_by_name = {}
+        for app_data in data["applications"]:
+            app = ApplicationSnapshot.from_dict(app_data)
+            applications[app.app_id] = app
+            applications_by_name.setdefault(app.name, app)
+        return cls(
+            user_id=data["user_id"],
+            first_name=data["first_name"],
+            surname=data["surname"],
+            today_screentime_usage=data["today_screentime_usage"],
+            average_screentime_usage=data["average_screentime_usage"],
+            account_balance=data["account_balance"],
+            account_currency=data["account_currency"],
+            blocked_platforms=frozenset(OverrideTarget[p] for p in data["blocked_platforms"]),
+            devices=tuple(DeviceSnapshot.from_dict(d) for d in data["devices"]),
+            applications=MappingProxyType(applications),
+            applications_by_name=MappingProxyType(applications_by_name),
+            pending_requests=tuple(data["pending_requests"]),
+            application_usage=data["application_usage"],
+            device_usage=data["device_usage"]
+        )
+
+
+def _application_usage(applications: Iterable[ApplicationSnapshot],
+                       limit: int,
+                       threshold: float) -> dict[str, float]:
+    """Return the usage in minutes of each application by name."""
+    if limit <= 0 and threshold <= 0:
+        return {app.name: app.usage for app in applications}
+    ranked = sorted(
+        (app for app in applications if app.usage >= threshold),
+        key=lambda app: app.usage,
+        reverse=True
+    )
+    if limit > 0:
+        ranked = ranked[:limit]
+    return {app.name: app.usage for app in ranked}
+
+
+@dataclass(frozen=True, slots=True)
+class FamilySnapshot:
+    """All managed accounts and pending requests of a family."""
+
+    accounts: Mapping[str, AccountSnapshot] = _EMPTY
+    requests: Mapping[str, dict] = _EMPTY
+
+    def get_account(self, user_id: str) -> AccountSnapshot:
+        """Return a single account."""
+        return self.accounts[user_id]
+
+    def get_request(self, request_id: str) -> dict:
+        """Return a single pending request."""
+        return self.requests[request_id]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable dict."""
+        return {
+            "accounts": [a.as_dict() for a in self.accounts.values()],
+            "requests": list(self.requests.values())
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "FamilySnapshot":
+        """Create from a dict returned by as_dict."""
+        accounts = [AccountSnapshot.from_dict(a) for a in data["accounts"]]
+        return cls(
+            accounts=MappingProxyType({a.user_id: a for a in accounts}),
+            requests=MappingProxyType({r["id"]: r for r in data["requests"]})
+        )
@@ -0,0 +1,181 @@
+"""Import screentime as Home Assistant long-term statistics."""
+
+import asyncio
+import contextlib
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics
+)
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DOMAIN, STATISTICS_BACKFILL_DAYS, STATISTICS_IMPORT_MINUTE
+from .coordinator import FamilySafetyCoordinator
+from .history import account_key, application_key, device_key, parse_key
+
+_LOGGER = logging.getLogger(__name__)
+
+_EPOCH = dt_util.utc_from_timestamp(0)
+
+type Rows = list[tuple[datetime, float]]
+
+
+def statistic_id(key: str) -> str:
+    """Return the external statistic ID of a history key."""
+    return f"{DOMAIN}:{slugify(key.replace('/', '_'))}"
+
+
+class StatisticsImporter:
+    """Imports the hourly usage history as external statistics.
+
+    Shortly after each hour the completed hours of every account, application
+    and device are added to the recorder as a running sum of minutes used, so
+    usage can be graphed over any period without recording a state on every
+    refresh. The first import of an account is backfilled with the daily
+    usage of the days before the history starts.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator: FamilySafetyCoordinator) -> None:
+        """Create a StatisticsImporter."""
+        self._hass = hass
+        self._coordinator = coordinator
+        # start of the next hour to import and the sum so far, by statistic ID.
+        self._imported: dict[str, tuple[datetime, float]] = {}
+        self._lock = asyncio.Lock()
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Import now and after every hour, returns a callback to stop importing."""
+        if "recorder" not in self._hass.config.components:
+            _LOGGER.warning("Recorder is not loaded, screen time statistics are not imported")
+            return lambda: None
+        self._coordinator.config_entry.async_create_background_task(
+            self._hass, self.async_import(), f"{DOMAIN}_import_statistics")
+        return async_track_time_change(
+            self._hass, self._async_import_hour, minute=STATISTICS_IMPORT_MINUTE, second=0)
+
+    async def _async_import_hour(self, now: datetime) -> None:
+        """Import the hour just completed."""
+        await self.async_import()
+
+    def _name(self, key: str) -> str:
+        """Return the statistic name of a history key."""
+        user_id, kind, item_id = parse_key(key)
+        account = self._coordinator.data.accounts.get(user_id)
+        name = user_id if account is None else str(account.first_name)
+        if kind == "app":
+            entry = self._coordinator.catalog.get(item_id)
+            return f"{name} {item_id if entry is None else entry.name} Screen Time"
+        if kind == "device":
+            devices = {d.device_id: d.device_name for d in account.devices} if account else {}
+            return f"{name} {devices.get(item_id, item_id)} Screen Time"
+        return f"{name} Screen Time"
+
+    async def _async_last_imported(self, stat_id: str) -> tuple[datetime, float] | None:
+        """Return the start of the next hour and the sum of the last imported statistic."""
+        if stat_id in self._imported:
+            return self._imported[stat_id]
+        result = await get_instance(self._hass).async_add_executor_job(
+            get_last_statistics, self._hass, 1, stat_id, True, {"sum"})
+        if not result.get(stat_id):
+            return None
+        row = result[stat_id][0]
+        return dt_util.utc_from_timestamp(row["start"]) + timedelta(hours=1), row["sum"] or 0
+
+    async def _async_backfill(self, user_id: str, until: datetime) -> dict[str, Rows]:
+        """Return the daily usage of each series of an account before a local midnight.
+
+        The API only reports totals for a period, so each day is a single row
+        starting at the hour of local midnight.
+        """
+        rows: dict[str, Rows] = defaultdict(list)
+        if user_id not in self._coordinator.data.accounts:
+            return rows
+        account = None
+        # the roster may have been refreshed since the snapshot.
+        with contextlib.suppress(IndexError):
+            account = self._coordinator.api.get_account(user_id)
+        if account is None:
+            return rows
+        for offset in range(STATISTICS_BACKFILL_DAYS, 0, -1):
+            start = until - timedelta(days=offset)
+            end = start + timedelta(days=1, seconds=-1)
+            try:
+                report = await self._coordinator.async_run_command(
+                    lambda s=start, e=end: account.get_screentime_usage(start_time=s, end_time=e))
+            except Exception as err:
+                _LOGGER.debug("Unable to backfill screen time of %s on %s: %s",
+                              user_id, start.date(), err)
+                continue
+            # statistics start on the hour, local midnight may not be in UTC+5:30 and the like.
+            day = dt_util.as_utc(start).replace(minute=0, second=0, microsecond=0)
+            aggregates = (report.get("devices") or {}).get("deviceUsageAggregates") or {}
+            rows[account_key(user_id)].append((day, (aggregates.get("totalScreenTime") or 0) / 60000))
+            for device in aggregates.get("deviceAggregates") or []:
+                rows[device_key(user_id, device["deviceId"].replace("g:", ""))].append(
+                    (day, (device.get("timeUsed") or 0) / 60000))
+            for app in (report.get("applications") or {}).get("appActivity") or []:
+                rows[application_key(user_id, app["appId"])].append(
+                    (day, (app.get("usage") or 0) / 60000))
+        return rows
+
+    def _history_start(self, key: str, end: datetime) -> datetime:
+        """Return the local midnight of the first day with usage in the history."""
+        for hour, usage in self._coordinator.history.hourly(key, _EPOCH, end):
+            if usage:
+                return dt_util.start_of_local_day(dt_util.as_local(hour))
+        return dt_util.start_of_local_day()
+
+    async def async_import(self) -> None:
+        """Import the completed hours not yet imported."""
+        async with self._lock:
+            end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+            by_account: dict[str, set[str]] = defaultdict(set)
+            for key in self._coordinator.history:
+                by_account[parse_key(key)[0]].add(key)
+            for user_id, keys in by_account.items():
+                backfill: dict[str, Rows] = {}
+                if await self._async_last_imported(statistic_id(account_key(user_id))) is None:
+                    if self._coordinator.api is None:
+                        # backfilled once logged in.
+                        continue
+                    backfill = await self._async_backfill(
+                        user_id, self._history_start(account_key(user_id), end))
+                    keys |= set(backfill)
+                for key in keys:
+                    await self._async_import_series(key, end, backfill.get(key, []))
+
+    async def _async_import_series(self, key: str, end: datetime, backfill: Rows) -> None:
+        """Import the hours of a single series before end."""
+        stat_id = statistic_id(key)
+        last = await self._async_last_imported(stat_id)
+        start, total = last if last is not None else (_EPOCH, 0.0)
+        hours = list(backfill) if last is None else []
+        hours += self._coordinator.history.hourly(key, start, end)
+        statistics = []
+        for hour, usage in hours:
+            if usage:
+                total += usage
+                statistics.append(StatisticData(start=hour, state=usage, sum=total))
+        self._imported[stat_id] = (end, total)
+        if not statistics:
+            return
+        async_add_external_statistics(
+            self._hass,
+            StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=self._name(key),
+                source=DOMAIN,
+                statistic_id=stat_id,
+                unit_of_measurement="min"
+            ),
+            statistics
+        )
@@ -3,9 +3,7 @@
 import logging
 from typing import Any
 
-from pyfamilysafety import Account
-
-from homeassistant.components.switch import SwitchEntity, SwitchDeviceClass
+from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN, SwitchEntity, SwitchDeviceClass
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
@@ -13,7 +11,12 @@ from .coordinator import FamilySafetyCoordinator
 
 from .const import DEFAULT_OVERRIDE_ENTITIES
 from .config_entry import FamilySafetyConfigEntry
-from .entity_base import PlatformOverrideEntity, ApplicationEntity
+from .entity_base import (
+    PlatformOverrideEntity,
+    ApplicationEntity,
+    async_add_account_entities,
+    async_add_application_entities
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,34 +27,31 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Family Safety switches."""
-    accounts: list[Account] = config_entry.runtime_data.api.accounts
-    entities = []
-    for account in accounts:
-        if (
-            (config_entry.options.get("accounts", None) is None)
-            or (account.user_id in config_entry.options.get("accounts", []))
-            or (len(config_entry.options.get("accounts", [])) == 0)
-        ):
-            for platform in DEFAULT_OVERRIDE_ENTITIES:
-                entities.append(
-                    PlatformOverrideSwitch(
-                        coordinator=config_entry.runtime_data,
-                        idx=None,
-                        account_id=account.user_id,
-                        platform=platform,
-                    )
-                )
-            for app in config_entry.options.get("tracked_applications", []):
-                entities.append(
-                    ApplicationBlockSwitch(
-                        coordinator=config_entry.runtime_data,
-                        idx=None,
-                        account_id=account.user_id,
-                        app_id=app,
-                    )
-                )
-
-    async_add_entities(entities, True)
+    async_add_account_entities(
+        config_entry,
+        async_add_entities,
+        lambda account: [
+            PlatformOverrideSwitch(
+                coordinator=config_entry.runtime_data,
+                idx=None,
+                account_id=account.user_id,
+                platform=platform,
+            ) for platform in DEFAULT_OVERRIDE_ENTITIES
+        ]
+    )
+    async_add_application_entities(
+        hass,
+        config_entry,
+        async_add_entities,
+        SWITCH_DOMAIN,
+        unique_id_fn=lambda account_id, app_id: f"{account_id}_override_{app_id.lower()}",
+        entity_fn=lambda account_id, app_id: ApplicationBlockSwitch(
+            coordinator=config_entry.runtime_data,
+            idx=None,
+            account_id=account_id,
+            app_id=app_id,
+        )
+    )
 
 
 class ApplicationBlockSwitch(ApplicationEntity, SwitchEntity):
@@ -60,11 +60,13 @@ class ApplicationBlockSwitch(ApplicationEntity, SwitchEntity):
     @property
     def name(self) -> str:
         """Return entity name."""
-        return f"{self._account.first_name} Block {self._application.name}"
+        return f"{self._account.first_name} Block {self._application_name}"
 
     @property
     def is_on(self) -> bool:
         """Return entity state."""
+        if self._optimistic_state is not None:
+            return self._optimistic_state
         return self._application.blocked
 
     @property
@@ -74,13 +76,13 @@ class ApplicationBlockSwitch(ApplicationEntity, SwitchEntity):
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn off entity."""
-        await self._application.unblock_app()
-        self.schedule_update_ha_state()
+        await self._async_optimistic(
+            False, self._async_set_application_blocked(self._api_application, False))
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on entity."""
-        await self._application.block_app()
-        self.schedule_update_ha_state()
+        await self._async_optimistic(
+            True, self._async_set_application_blocked(self._api_application, True))
 
 
 class PlatformOverrideSwitch(PlatformOverrideEntity, SwitchEntity):
@@ -100,6 +102,8 @@ class PlatformOverrideSwitch(PlatformOverrideEntity, SwitchEntity):
     @property
     def is_on(self) -> bool:
         """Return entity state."""
+        if self._optimistic_state is not None:
+            return self._optimistic_state
         return self._get_override_state
 
     @property
@@ -109,10 +113,8 @@ class PlatformOverrideSwitch(PlatformOverrideEntity, SwitchEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on entity."""
-        await self._enable_override()
-        self.schedule_update_ha_state()
+        await self._async_optimistic(True, self._enable_override())
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn off entity."""
-        await self._disable_override()
-        self.schedule_update_ha_state()
+        await self._async_optimistic(False, self._disable_override())
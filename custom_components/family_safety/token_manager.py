@@ -0,0 +1,112 @@
+"""Family Safety access token lifecycle."""
+
+import logging
+from datetime import datetime
+
+from pyfamilysafety.api import FamilySafetyAPI
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import TOKEN_REFRESH_MARGIN, TOKEN_RETRY_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TokenManager:
+    """Refreshes the access token ahead of expiry and persists rotated refresh tokens.
+
+    pyfamilysafety only refreshes the access token once a request finds it has
+    expired, adding a token round trip to a poll. The rotated refresh token is
+    also only kept in memory, so it is written back to the config entry options.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Create a TokenManager."""
+        self._hass = hass
+        self._entry = entry
+        self._api: FamilySafetyAPI | None = None
+        self._unsub_refresh: CALLBACK_TYPE | None = None
+        entry.async_on_unload(self.async_stop)
+
+    @property
+    def refresh_token(self) -> str | None:
+        """Return the current refresh token."""
+        if self._api is None:
+            return None
+        return self._api.authenticator.refresh_token
+
+    @property
+    def expires(self) -> datetime | None:
+        """Return when the access token expires (naive local time)."""
+        if self._api is None:
+            return None
+        return self._api.authenticator.expires
+
+    @callback
+    def async_start(self, api: FamilySafetyAPI) -> None:
+        """Start managing the tokens of a logged in client."""
+        self._api = api
+        self._async_persist_refresh_token()
+        self._async_schedule_refresh()
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop refreshing tokens."""
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+
+    @callback
+    def _async_schedule_refresh(self, delay: float | None = None) -> None:
+        """Schedule a refresh before the access token expires."""
+        self.async_stop()
+        if delay is None:
+            if self.expires is None:
+                delay = 0
+            else:
+                # the library stores expiry as a naive local time.
+                delay = max(
+                    (self.expires - datetime.now()).total_seconds() - TOKEN_REFRESH_MARGIN, 0)
+        _LOGGER.debug("Scheduling access token refresh in %s seconds", delay)
+        self._unsub_refresh = async_call_later(self._hass, delay, self._async_refresh)
+
+    async def _async_refresh(self, _now: datetime) -> None:
+        """Refresh the access token."""
+        self._unsub_refresh = None
+        await self.async_refresh()
+
+    async def async_refresh(self) -> bool:
+        """Refresh the access token now, returns if successful."""
+        if self._api is None:
+            return False
+        previous = self.expires
+        try:
+            await self._api.authenticator.perform_refresh()
+        except Exception as err:
+            _LOGGER.warning("Access token refresh failed: %s", err)
+        if self.expires is None or self.expires == previous:
+            # the authenticator does not raise when the token endpoint fails.
+            self._async_schedule_refresh(TOKEN_RETRY_DELAY)
+            return False
+        # the session header is only replaced when the library refreshes itself.
+        self._api._session.headers.pop("Authorization", None)
+        self._async_persist_refresh_token()
+        self._async_schedule_refresh()
+        return True
+
+    @callback
+    def _async_persist_refresh_token(self) -> None:
+        """Write a rotated refresh token back to the config entry."""
+        token = self.refresh_token
+        if token is None:
+            return
+        if token == self._entry.options.get(
+                "refresh_token", self._entry.data.get("refresh_token")):
+            return
+        _LOGGER.debug("Persisting rotated refresh token")
+        self._hass.config_entries.async_update_entry(
+            self._entry,
+            options={**self._entry.options, "refresh_token": token}
+        )
@@ -0,0 +1,242 @@
+"""Benchmark the integration against the offline API simulator.
+
+Sets up a config entry in a bare Home Assistant instance with the client
+replaced by a SimulatedFamilySafetyAPI, then measures:
+
+- setup time of the config entry and its platforms
+- latency and API calls of a full refresh
+- state writes (state_changed events) per refresh
+- memory allocated per entity during setup
+- CPU time of extra_state_attributes per entity
+
+Run with scripts/benchmark, for example:
+
+    scripts/benchmark --accounts 8 --applications 200 --refreshes 20 --json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any
+from unittest.mock import patch
+
+from homeassistant import config_entries, loader
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import (
+    area_registry as ar,
+    category_registry as cr,
+    device_registry as dr,
+    entity_platform,
+    entity_registry as er,
+    floor_registry as fr,
+    issue_registry as ir,
+    label_registry as lr,
+)
+from homeassistant.util import dt as dt_util
+
+from simulator import SimulatedFamily, SimulatedFamilySafetyAPI, async_create_simulated_client
+
+ROOT = Path(__file__).resolve().parent.parent
+DOMAIN = "family_safety"
+
+
+def _parse_args() -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=4)
+    parser.add_argument("--devices", type=int, default=3)
+    parser.add_argument("--applications", type=int, default=50)
+    parser.add_argument("--tracked", type=int, default=10,
+                        help="applications with switch and sensor entities")
+    parser.add_argument("--activity", type=float, default=0.1,
+                        help="share of applications and devices used between refreshes")
+    parser.add_argument("--requests", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per API call")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--aggregator-rate", type=float, default=0.0)
+    parser.add_argument("--refreshes", type=int, default=10)
+    parser.add_argument("--attribute-calls", type=int, default=100,
+                        help="extra_state_attributes calls per entity")
+    parser.add_argument("--experimental", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args()
+
+
+async def _async_start_hass(config_dir: Path) -> HomeAssistant:
+    """Start a bare Home Assistant with the integration as a custom component."""
+    (config_dir / "custom_components").mkdir()
+    (config_dir / "custom_components" / DOMAIN).symlink_to(
+        ROOT / "custom_components" / DOMAIN, target_is_directory=True)
+    # custom components are imported from the config directory.
+    sys.path.insert(0, str(config_dir))
+    hass = HomeAssistant(str(config_dir))
+    await hass.config.async_set_time_zone("UTC")
+    loader.async_setup(hass)
+    await asyncio.gather(
+        ar.async_load(hass),
+        cr.async_load(hass),
+        dr.async_load(hass),
+        er.async_load(hass),
+        fr.async_load(hass),
+        ir.async_load(hass),
+        lr.async_load(hass),
+    )
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await hass.async_start()
+    return hass
+
+
+def _summary(values: list[float]) -> dict[str, float]:
+    """Return the mean, median and worst of a series."""
+    if not values:
+        return {}
+    return {
+        "mean": round(statistics.fmean(values), 4),
+        "median": round(statistics.median(values), 4),
+        "max": round(max(values), 4)
+    }
+
+
+async def async_run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the benchmark and return the results."""
+    family = SimulatedFamily(
+        accounts=args.accounts,
+        devices=args.devices,
+        applications=args.applications,
+        activity=args.activity,
+        requests=args.requests,
+        seed=args.seed
+    )
+    api = SimulatedFamilySafetyAPI(
+        family,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        aggregator_rate=args.aggregator_rate,
+        seed=args.seed
+    )
+    tracked = list(next(iter(family.accounts.values())).applications)[:args.tracked]
+
+    async def _async_create_client(hass, token, experimental=False):
+        return await async_create_simulated_client(api, experimental)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _async_start_hass(Path(config_dir))
+        writes = 0
+
+        def _count_write(_event) -> None:
+            nonlocal writes
+            writes += 1
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, _count_write)
+        entry = config_entries.ConfigEntry(
+            version=1,
+            minor_version=1,
+            domain=DOMAIN,
+            title="Simulated Family Safety",
+            data={"refresh_token": "simulated-refresh-token", "update_interval": 3600},
+            options={"tracked_applications": tracked, "experimental": args.experimental},
+            source=config_entries.SOURCE_USER,
+            unique_id=None,
+            discovery_keys=MappingProxyType({})
+        )
+        with patch(f"custom_components.{DOMAIN}.async_create_client", _async_create_client):
+            tracemalloc.start()
+            memory_before = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            await hass.config_entries.async_add(entry)
+            await hass.async_block_till_done()
+            setup_time = time.perf_counter() - started
+            memory_after = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            setup_calls = sum(api.calls.values())
+
+            coordinator = entry.runtime_data
+            entities = [
+                e for platform in entity_platform.async_get_platforms(hass, DOMAIN)
+                for e in platform.entities.values()
+            ]
+            setup_writes = writes
+
+            latencies: list[float] = []
+            refresh_writes: list[int] = []
+            refresh_calls: list[int] = []
+            for _ in range(args.refreshes):
+                # every tier of every account is due, a full refresh.
+                for schedule in coordinator._next_refresh.values():
+                    for tier in schedule:
+                        schedule[tier] = dt_util.utc_from_timestamp(0)
+                writes = 0
+                calls = sum(api.calls.values())
+                started = time.perf_counter()
+                await coordinator.async_refresh()
+                await hass.async_block_till_done()
+                latencies.append(time.perf_counter() - started)
+                refresh_writes.append(writes)
+                refresh_calls.append(sum(api.calls.values()) - calls)
+
+            attribute_times: list[float] = []
+            for entity in entities:
+                started = time.process_time()
+                for _ in range(args.attribute_calls):
+                    entity.extra_state_attributes
+                attribute_times.append(
+                    (time.process_time() - started) / args.attribute_calls * 1e6)
+
+        await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_stop()
+
+    return {
+        "family": {
+            "accounts": args.accounts,
+            "devices": args.devices,
+            "applications": args.applications,
+            "tracked_applications": len(tracked),
+            "entities": len(entities)
+        },
+        "setup": {
+            "seconds": round(setup_time, 4),
+            "api_calls": setup_calls,
+            "state_writes": setup_writes,
+            "memory_per_entity_bytes": round((memory_after - memory_before) / max(len(entities), 1))
+        },
+        "refresh": {
+            "seconds": _summary(latencies),
+            "api_calls": _summary(refresh_calls),
+            "state_writes": _summary(refresh_writes)
+        },
+        "extra_state_attributes_us": _summary(attribute_times),
+        "api_calls_by_endpoint": dict(api.calls),
+        "api_errors": dict(api.errors)
+    }
+
+
+def main() -> int:
+    """Run the benchmark from the command line."""
+    args = _parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    results = asyncio.run(async_run(args))
+    if args.json:
+        sys.stdout.write(json.dumps(results, indent=2) + "\n")
+        return 0
+    for section, values in results.items():
+        sys.stdout.write(f"{section}\n")
+        for key, value in values.items():
+            sys.stdout.write(f"  {key:<28} {value}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
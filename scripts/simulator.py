@@ -0,0 +1,323 @@
+"""Offline stand-in for the Microsoft Family Safety API.
+
+Generates a family of accounts, devices and applications and serves it
+through the same send_request interface as pyfamilysafety, with configurable
+latency and error rates. The pyfamilysafety models parse the responses as
+they would for the real API, so the integration can be run and measured
+without a Microsoft account.
+"""
+
+import asyncio
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from pyfamilysafety import FamilySafety
+from pyfamilysafety.account import Account
+from pyfamilysafety.api import FamilySafetyAPI
+from pyfamilysafety.const import ENDPOINTS
+from pyfamilysafety.exceptions import AggregatorException, HttpException, Unauthorized
+
+PLATFORMS = ("Windows", "Xbox", "Mobile")
+APP_PREFIXES = ("appx:", "x:", "a:")
+
+
+@dataclass
+class SimulatedDevice:
+    """A single device of a simulated account."""
+
+    device_id: str
+    name: str
+    platform: str
+    time_used: int = 0
+
+
+@dataclass
+class SimulatedApplication:
+    """A single application of a simulated account."""
+
+    app_id: str
+    name: str
+    usage: int = 0
+    blocked: bool = False
+
+
+@dataclass
+class SimulatedAccount:
+    """A single simulated account."""
+
+    user_id: str
+    first_name: str
+    devices: list[SimulatedDevice] = field(default_factory=list)
+    applications: dict[str, SimulatedApplication] = field(default_factory=dict)
+    overrides: set[str] = field(default_factory=set)
+    balance: float = 0.0
+
+
+class SimulatedFamily:
+    """Deterministic family of accounts × devices × applications.
+
+    Every screentime report advances usage: a share of the applications and
+    devices of each account gain a few minutes, so each refresh contains
+    changes the way an active family would.
+    """
+
+    def __init__(self,
+                 accounts: int = 4,
+                 devices: int = 3,
+                 applications: int = 50,
+                 activity: float = 0.1,
+                 requests: int = 0,
+                 seed: int = 0) -> None:
+        """Create a family."""
+        self._random = random.Random(seed)
+        self.activity = activity
+        self.accounts: dict[str, SimulatedAccount] = {}
+        for a in range(accounts):
+            account = SimulatedAccount(
+                user_id=str(1000 + a), first_name=f"Child{a}", balance=round(a * 2.5, 2))
+            for d in range(devices):
+                account.devices.append(SimulatedDevice(
+                    device_id=f"{account.user_id}-device-{d}",
+                    name=f"Device {d}",
+                    platform=PLATFORMS[d % len(PLATFORMS)]))
+            for k in range(applications):
+                app_id = f"{APP_PREFIXES[k % len(APP_PREFIXES)]}app{k}"
+                account.applications[app_id] = SimulatedApplication(app_id, f"Application {k}")
+            self.accounts[account.user_id] = account
+        self.requests: list[dict[str, Any]] = []
+        for r in range(requests):
+            self.add_request(list(self.accounts)[r % accounts])
+
+    def add_request(self, user_id: str) -> dict[str, Any]:
+        """Add a pending screen time request for an account."""
+        request = {
+            "id": f"request-{self._random.getrandbits(64):016x}",
+            "puid": user_id,
+            "type": "DeviceScreenTime",
+            "platform": "Windows",
+            "lockTime": datetime.now().isoformat(),
+            "requestedTime": 1800000
+        }
+        self.requests.append(request)
+        return request
+
+    def advance(self, account: SimulatedAccount) -> None:
+        """Add usage to a share of the applications and devices of an account."""
+        for app in account.applications.values():
+            if self._random.random() < self.activity:
+                app.usage += self._random.randint(1, 5) * 60000
+        for device in account.devices:
+            if self._random.random() < self.activity:
+                device.time_used += self._random.randint(1, 5) * 60000
+
+    def roster(self) -> dict[str, Any]:
+        """Return the get_accounts response."""
+        return {"members": [
+            {
+                "id": a.user_id,
+                "role": "User",
+                "profilePicUrl": None,
+                "isDigitalSafetyEnabled": True,
+                "user": {"firstName": a.first_name, "lastName": "Simulated"}
+            } for a in self.accounts.values()
+        ]}
+
+    def device_usage(self, account: SimulatedAccount) -> dict[str, Any]:
+        """Return the get_user_device_screentime_usage response."""
+        self.advance(account)
+        return {"deviceUsageAggregates": {
+            "totalScreenTime": sum(d.time_used for d in account.devices),
+            "dailyAverage": sum(d.time_used for d in account.devices) / 7,
+            "deviceAggregates": [
+                {"deviceId": d.device_id, "timeUsed": d.time_used} for d in account.devices
+            ]
+        }}
+
+    def app_usage(self, account: SimulatedAccount) -> dict[str, Any]:
+        """Return the get_user_app_screentime_usage response."""
+        return {"appActivity": [
+            {
+                "appId": app.app_id,
+                "displayName": app.name,
+                "iconUrl": None,
+                "usage": app.usage,
+                "policy": None,
+                "blockState": "BlockedAlways" if app.blocked else "NotBlocked",
+                "isLegacyBlocked": False
+            } for app in account.applications.values()
+        ]}
+
+    def devices(self, account: SimulatedAccount) -> dict[str, Any]:
+        """Return the get_user_devices response."""
+        return {"devices": [
+            {
+                "deviceId": f"g:{d.device_id}",
+                "deviceName": d.name,
+                "deviceClass": d.platform,
+                "deviceMake": "Simulated",
+                "deviceModel": "Simulated",
+                "deviceFormFactor": "Desktop",
+                "osName": d.platform,
+                "issues": [],
+                "states": [],
+                "lastSeenOn": datetime.now().isoformat()
+            } for d in account.devices
+        ]}
+
+    def overrides(self, account: SimulatedAccount) -> dict[str, Any]:
+        """Return the get_override_device_restrictions response."""
+        return {"lockablePlatforms": [
+            {
+                "appliesTo": platform,
+                "overrides": [{"type": "BlockUntil"}] if platform in account.overrides else [],
+                "devices": [
+                    {"deviceId": f"g:{d.device_id}"}
+                    for d in account.devices if d.platform == platform
+                ]
+            } for platform in PLATFORMS
+        ]}
+
+
+class SimulatedAuthenticator:
+    """Authenticator that never calls the Microsoft token endpoint."""
+
+    def __init__(self) -> None:
+        """Create a logged in authenticator."""
+        self.refresh_token = "simulated-refresh-token"
+        self.access_token = "simulated-access-token"
+        self.expires = datetime.now() + timedelta(hours=1)
+
+    async def perform_refresh(self) -> None:
+        """Issue a new access token."""
+        self.expires = datetime.now() + timedelta(hours=1)
+
+
+class _Headers(dict):
+    """Session headers, the library adds and pops the authorization header."""
+
+    def add(self, key: str, value: str) -> None:
+        """Add a header."""
+        self[key] = value
+
+
+class _Session:
+    """Stands in for the aiohttp session of the library."""
+
+    def __init__(self) -> None:
+        """Create a session."""
+        self.headers = _Headers()
+        self.connector = None
+        self.connector_owner = False
+
+    async def close(self) -> None:
+        """Close the session."""
+
+
+class SimulatedFamilySafetyAPI(FamilySafetyAPI):
+    """FamilySafetyAPI serving a SimulatedFamily.
+
+    Each request sleeps for latency ± jitter seconds and fails with an
+    aggregator error, an HTTP 503 or an HTTP 401 at the given rates. Calls
+    are counted by endpoint.
+    """
+
+    def __init__(self,
+                 family: SimulatedFamily,
+                 latency: float = 0.05,
+                 jitter: float = 0.02,
+                 error_rate: float = 0.0,
+                 aggregator_rate: float = 0.0,
+                 unauthorized_rate: float = 0.0,
+                 seed: int = 0) -> None:
+        """Create a simulated API, no session is opened."""
+        self.authenticator = SimulatedAuthenticator()
+        self._session = _Session()
+        self.family = family
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.aggregator_rate = aggregator_rate
+        self.unauthorized_rate = unauthorized_rate
+        self.calls: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self._random = random.Random(seed)
+
+    async def end_session(self):
+        """End the session."""
+
+    def _account(self, user_id: str) -> SimulatedAccount:
+        """Return an account of the family."""
+        try:
+            return self.family.accounts[user_id]
+        except KeyError as err:
+            raise HttpException("HTTP Error", 404, "Unknown user") from err
+
+    async def send_request(self, endpoint: str, body: object = None, headers: dict = None,
+                           platform: str = None, **kwargs):
+        """Serve a request from the simulated family."""
+        if endpoint not in ENDPOINTS:
+            raise ValueError("Endpoint does not exist")
+        self.calls[endpoint] += 1
+        await asyncio.sleep(max(self.latency + self._random.uniform(-self.jitter, self.jitter), 0))
+        roll = self._random.random()
+        if roll < self.unauthorized_rate:
+            self.errors["unauthorized"] += 1
+            raise Unauthorized()
+        roll -= self.unauthorized_rate
+        if roll < self.aggregator_rate:
+            self.errors["aggregator"] += 1
+            raise AggregatorException()
+        roll -= self.aggregator_rate
+        if roll < self.error_rate:
+            self.errors["http"] += 1
+            raise HttpException("HTTP Error", 503, "Service unavailable")
+        payload = self._handle(endpoint, body, kwargs)
+        return {"status": 200, "text": json.dumps(payload), "json": payload, "headers": {}}
+
+    def _handle(self, endpoint: str, body: Any, kwargs: dict[str, Any]) -> Any:
+        """Return the JSON response of an endpoint."""
+        family = self.family
+        if endpoint == "get_accounts":
+            return family.roster()
+        if endpoint == "get_pending_requests":
+            return {"pendingRequests": list(family.requests)}
+        if endpoint in ("approve_pending_request", "deny_pending_request"):
+            family.requests = [r for r in family.requests if r["id"] != body["id"]]
+            return None
+        account = self._account(kwargs["USER_ID"])
+        if endpoint == "get_user_device_screentime_usage":
+            return family.device_usage(account)
+        if endpoint == "get_user_app_screentime_usage":
+            return family.app_usage(account)
+        if endpoint == "get_user_devices":
+            return family.devices(account)
+        if endpoint == "get_override_device_restrictions":
+            return family.overrides(account)
+        if endpoint == "override_device_restriction":
+            if body["overrideType"] == "Cancel":
+                account.overrides.discard(body["target"])
+            else:
+                account.overrides.add(body["target"])
+            return family.overrides(account)
+        if endpoint == "get_user_spending":
+            return {"balances": [{"balance": account.balance, "currency": "GBP"}]}
+        if endpoint == "set_app_policy":
+            account.applications[kwargs["APP_ID"]].blocked = body["blockState"] == "BlockedAlways"
+            return None
+        raise HttpException("HTTP Error", 404, f"{endpoint} is not simulated")
+
+
+async def async_create_simulated_client(api: SimulatedFamilySafetyAPI,
+                                        experimental: bool = False) -> FamilySafety:
+    """Log in and collect all data from a simulated API, equivalent to FamilySafety.create."""
+    family_safety = FamilySafety(api)
+    accounts = await api.send_request("get_accounts")
+    family_safety.accounts = await Account.from_dict(api, accounts.get("json"), experimental)
+    family_safety.experimental = experimental
+    if experimental:
+        await family_safety._get_pending_requests()
+    return family_safety